@@ -51,7 +51,7 @@ You should output the name of agent directly. The next agent is:'''
         
         commented_agents = str(commented_agents_name)     
         remaining_agents = str(list(set(all_agents_name) - set(commented_agents_name)))
-        answer = self.forward_chain.predict(
+        answer = self.predict(
             problem_description=problem['description'], 
             agents_info=agents_info,
             commented_agents=commented_agents,
@@ -64,6 +64,8 @@ You should output the name of agent directly. The next agent is:'''
             if name in answer:
                 return agent
 
-        print('Can not find agent, random choice!')
-        return random.choice(list(agent_name_to_obj.values()))
+        # fall back to an agent that has not commented yet instead of repeating one
+        remaining = [e for e in all_agents if e.name not in commented_agents_name]
+        print('Can not find agent, choose the next remaining agent!')
+        return remaining[0] if remaining else random.choice(all_agents)
 
@@ -1,8 +1,9 @@
 from langchain import PromptTemplate, OpenAI, LLMChain
 from langchain.chat_models import ChatOpenAI
+from agents.llm_call import ChainPredictMixin
 
 
-class BaseAgent(object):
+class BaseAgent(ChainPredictMixin):
 
     def __init__(self, name, description, model):
         self.name = name
@@ -93,7 +94,7 @@ Task Description:
         )
 
     def forward(self, problem_description):
-        output = self.forward_chain.predict(
+        output = self.predict(
             problem_description=problem_description
         )
         
@@ -2,8 +2,9 @@ from agents.base_agent import BaseAgent
 
 from langchain import PromptTemplate, OpenAI, LLMChain
 from langchain.chat_models import ChatOpenAI
+from agents.llm_call import ChainPredictMixin
 
-class BaseAgent(object):
+class BaseAgent(ChainPredictMixin):
 
     def __init__(self, name, description, model):
         self.name = name
@@ -147,7 +148,7 @@ Minimalist Format: Do not include any redundant explanations. Output the concise
                 llm=self.llm,
                 prompt=PromptTemplate.from_template(self.forward_prompt_template)
             )
-            output = self.forward_chain.predict(
+            output = self.predict(
                 problem_description=problem, 
                 identify_text = identify_text 
             )
@@ -157,7 +158,7 @@ Minimalist Format: Do not include any redundant explanations. Output the concise
                 llm=self.llm,
                 prompt=PromptTemplate.from_template(self.forward_prompt_template)
             )
-            output = self.forward_chain.predict(
+            output = self.predict(
                 problem_description=problem, 
                 identify_text = identify_text 
             )
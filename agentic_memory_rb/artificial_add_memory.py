@@ -34,7 +34,6 @@ if __name__ == "__main__":
                                 content = f.read()
                             print(f"  File: {file_path.name}")
                             description_list.append(content)
-                            catogory_list.append(type_name)
                             #print(f"  Content: {content[:100]}...")  # Preview first 100 chars
                         except Exception as e:
                             print(f"  Error reading {file_path.name}: {e}")
@@ -50,8 +49,10 @@ if __name__ == "__main__":
                         except Exception as e:
                             print(f"  Error reading {file_path.name}: {e}")
         num= len(analysis_list)
-        for i in range(num):
-            memory_system.add_note(description=description_list[i],
-                                   analysis=analysis_list[i],
-                                   code=code_list[i],
-                                   catogory=catogory_list[i])
\ No newline at end of file
+        memory_system.add_notes_bulk([
+            {"description": description_list[i],
+             "analysis": analysis_list[i],
+             "code": code_list[i],
+             "category": catogory_list[i]}
+            for i in range(num)
+        ])
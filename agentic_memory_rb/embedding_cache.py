@@ -0,0 +1,213 @@
+"""Persistent cache of text embeddings.
+
+Vectors of one embedding model are stored as rows of a memory-mapped float32
+matrix (`<model>.f32`), and an append-only jsonl file (`<model>.ids.jsonl`)
+maps the sha256 hash of each text to its row. Problem descriptions are
+embedded for retrieval, for insertion and for scoring, and again on every
+ablation re-run; with the cache only the first of those calls reaches the
+model.
+
+Several processes (parallel ablations, pool runners) may share the files.
+Writers take an exclusive lock on `<model>.lock`, read the id lines other
+processes appended since their last look, and only then pick the rows for
+new vectors, so two processes never write the same row. A row is flushed
+before its id line is appended, so an interrupted write only loses that
+entry.
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+from contextlib import contextmanager
+from typing import Callable, List, Optional, Sequence
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class EmbeddingCache:
+    """Embedding cache of a single model, backed by a float32 memmap."""
+
+    def __init__(self, directory: str, model_name: str, initial_capacity: int = 1024):
+        """Open (or create) the cache files of `model_name` under `directory`.
+
+        Args:
+            directory: Folder holding the cache files
+            model_name: Embedding model name, one matrix per model
+            initial_capacity: Number of rows allocated when the matrix is created
+        """
+        os.makedirs(directory, exist_ok=True)
+        safe_name = re.sub(r'[^A-Za-z0-9_.-]+', '_', model_name)
+        self.model_name = model_name
+        self.matrix_path = os.path.join(directory, f"{safe_name}.f32")
+        self.ids_path = os.path.join(directory, f"{safe_name}.ids.jsonl")
+        self.lock_path = os.path.join(directory, f"{safe_name}.lock")
+        self.initial_capacity = initial_capacity
+        self.lock = threading.Lock()
+        self.dim = None
+        self.rows = {}
+        self.matrix = None
+        self.hits = 0
+        self.misses = 0
+        # bytes of ids_path already read, and the first row not used by any process
+        self._ids_offset = 0
+        self._next_row = 0
+        with self.lock, self._file_lock():
+            self._load()
+
+    @staticmethod
+    def make_key(text: str) -> str:
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+    @contextmanager
+    def _file_lock(self):
+        """Exclusive lock shared with other processes using the same cache files."""
+        with open(self.lock_path, 'a+b') as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+                else:
+                    f.seek(0)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+    def _load(self):
+        """Read the id lines appended since the last call. Caller holds both locks."""
+        if not os.path.exists(self.ids_path):
+            return
+        with open(self.ids_path, 'rb') as f:
+            f.seek(self._ids_offset)
+            data = f.read()
+        # an unterminated last line is an interrupted write, read it again next time
+        end = data.rfind(b"\n") + 1
+        self._ids_offset += end
+        for line in data[:end].decode('utf-8', errors='ignore').splitlines():
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                # a line cut short by an interrupted write
+                continue
+            if "dim" in entry:
+                if entry.get("model") != self.model_name:
+                    raise ValueError(
+                        f"Embedding cache {self.ids_path} belongs to model {entry.get('model')}")
+                self.dim = int(entry["dim"])
+            else:
+                row = int(entry["row"])
+                self.rows[entry["key"]] = row
+                self._next_row = max(self._next_row, row + 1)
+        if self.dim is not None and os.path.exists(self.matrix_path):
+            self._open_matrix()
+            capacity = self.matrix.shape[0]
+            self.rows = {key: row for key, row in self.rows.items() if row < capacity}
+
+    def _open_matrix(self):
+        capacity = os.path.getsize(self.matrix_path) // (self.dim * 4)
+        if self.matrix is not None and self.matrix.shape[0] == capacity:
+            return
+        if self.matrix is not None:
+            self.matrix.flush()
+        self.matrix = np.memmap(self.matrix_path, dtype=np.float32, mode='r+', shape=(capacity, self.dim))
+
+    def _ensure_capacity(self, num_rows: int):
+        """Grow the matrix file to hold at least `num_rows` rows. Caller holds both locks."""
+        if os.path.exists(self.matrix_path):
+            # another process may have grown the file
+            self._open_matrix()
+        capacity = 0 if self.matrix is None else self.matrix.shape[0]
+        if num_rows <= capacity:
+            return
+        new_capacity = max(self.initial_capacity, capacity * 2, num_rows)
+        if self.matrix is not None:
+            self.matrix.flush()
+            self.matrix = None
+        with open(self.matrix_path, 'ab') as f:
+            f.truncate(new_capacity * self.dim * 4)
+        self._open_matrix()
+
+    def get_many(self, texts: Sequence[str]) -> List[Optional[np.ndarray]]:
+        """Cached vector of each text, or None where the text is not cached."""
+        with self.lock:
+            vectors = []
+            for text in texts:
+                row = self.rows.get(self.make_key(text))
+                if row is None:
+                    self.misses += 1
+                    vectors.append(None)
+                else:
+                    self.hits += 1
+                    vectors.append(np.array(self.matrix[row]))
+            return vectors
+
+    def put_many(self, texts: Sequence[str], vectors: Sequence[Sequence[float]]):
+        """Store the vectors of `texts`. Texts already cached are skipped."""
+        with self.lock, self._file_lock():
+            # rows and keys written by other processes since the last look
+            self._load()
+            new_entries = []
+            for text, vector in zip(texts, vectors):
+                key = self.make_key(text)
+                if key in self.rows:
+                    continue
+                vector = np.asarray(vector, dtype=np.float32).reshape(-1)
+                if self.dim is None:
+                    self.dim = vector.shape[0]
+                    with open(self.ids_path, 'a', encoding='utf-8') as f:
+                        f.write(json.dumps({"model": self.model_name, "dim": self.dim}) + "\n")
+                row = self._next_row
+                self._ensure_capacity(row + 1)
+                self.matrix[row] = vector
+                self.rows[key] = row
+                self._next_row = row + 1
+                new_entries.append((key, row))
+            if not new_entries:
+                return
+            self.matrix.flush()
+            with open(self.ids_path, 'a', encoding='utf-8') as f:
+                for key, row in new_entries:
+                    f.write(json.dumps({"key": key, "row": row}) + "\n")
+            # our own lines need not be read again
+            self._ids_offset = os.path.getsize(self.ids_path)
+
+    def embed(self, texts: Sequence[str], embed_fn: Callable[[List[str]], Sequence]) -> List[np.ndarray]:
+        """Embed `texts`, calling `embed_fn` only for the texts not in the cache."""
+        texts = list(texts)
+        vectors = self.get_many(texts)
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing:
+            # embed each distinct missing text once
+            missing_texts = list(dict.fromkeys(texts[i] for i in missing))
+            new_vectors = embed_fn(missing_texts)
+            self.put_many(missing_texts, new_vectors)
+            by_text = {text: np.asarray(vector, dtype=np.float32)
+                       for text, vector in zip(missing_texts, new_vectors)}
+            for i in missing:
+                vectors[i] = by_text[texts[i]]
+        return vectors
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'entries': len(self.rows),
+        }
+
+    def close(self):
+        with self.lock:
+            if self.matrix is not None:
+                self.matrix.flush()
+                self.matrix = None
@@ -0,0 +1,89 @@
+"""Process-wide registry of embedding models.
+
+Retrievers ask `get_embedding_function` for their model instead of building
+one each. The returned function is shared by every retriever of the process
+and only loads the model (and imports torch) on the first embed call, so
+importing the memory stack and opening a retriever stay cheap.
+
+Two backends are available:
+    sentence_transformers: SentenceTransformer on torch (default)
+    onnx: ONNX Runtime export of all-MiniLM-L6-v2 bundled with chromadb,
+          faster on CPU and without the torch import
+"""
+import threading
+from typing import List, Optional
+
+SENTENCE_TRANSFORMERS = 'sentence_transformers'
+ONNX = 'onnx'
+BACKENDS = (SENTENCE_TRANSFORMERS, ONNX)
+
+# models the onnx backend can serve
+ONNX_MODELS = ('all-MiniLM-L6-v2', 'sentence-transformers/all-MiniLM-L6-v2')
+
+_default_backend = SENTENCE_TRANSFORMERS
+_registry = {}
+_registry_lock = threading.Lock()
+
+
+class LazyEmbeddingFunction:
+    """Embedding function that loads its model on the first call."""
+
+    def __init__(self, model_name: str, backend: str):
+        self.model_name = model_name
+        self.backend = backend
+        self._model = None
+        self._lock = threading.Lock()
+
+    @property
+    def cache_name(self) -> str:
+        """Name under which the vectors of this function are cached."""
+        if self.backend == SENTENCE_TRANSFORMERS:
+            return self.model_name
+        return f"{self.model_name}@{self.backend}"
+
+    def _load(self):
+        with self._lock:
+            if self._model is None:
+                if self.backend == ONNX:
+                    from chromadb.utils.embedding_functions import ONNXMiniLM_L6_V2
+                    self._model = ONNXMiniLM_L6_V2()
+                else:
+                    from chromadb.utils.embedding_functions import SentenceTransformerEmbeddingFunction
+                    self._model = SentenceTransformerEmbeddingFunction(model_name=self.model_name)
+            return self._model
+
+    def __call__(self, texts: List[str]):
+        model = self._model if self._model is not None else self._load()
+        return model(texts)
+
+
+def configure_embedding_backend(backend: Optional[str]):
+    """Set the backend used when a retriever does not ask for one."""
+    global _default_backend
+    if backend is None:
+        return
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown embedding backend: {backend}, expected one of {BACKENDS}")
+    _default_backend = backend
+
+
+def get_embedding_function(model_name: str = "all-MiniLM-L6-v2", backend: Optional[str] = None) -> LazyEmbeddingFunction:
+    """Shared embedding function of `model_name` on `backend`.
+
+    Args:
+        model_name: SentenceTransformer model name
+        backend: 'sentence_transformers' or 'onnx', defaults to the configured backend
+
+    Returns:
+        The process-wide LazyEmbeddingFunction for this model and backend
+    """
+    backend = backend or _default_backend
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown embedding backend: {backend}, expected one of {BACKENDS}")
+    if backend == ONNX and model_name not in ONNX_MODELS:
+        raise ValueError(f"The onnx backend only provides all-MiniLM-L6-v2, not {model_name}")
+    with _registry_lock:
+        key = (model_name, backend)
+        if key not in _registry:
+            _registry[key] = LazyEmbeddingFunction(model_name, backend)
+        return _registry[key]
@@ -0,0 +1,154 @@
+"""Eviction policies for forgetting specific memories.
+
+A policy looks at the notes of every category and names the ones to drop.
+Per-category policies keep the `target_num` best notes of each category by
+their own ranking; BudgetPolicy bounds the total size of all notes instead.
+
+    score:  highest score (the original forgetting rule)
+    lru:    most recently retrieved
+    lfu:    most often retrieved
+    decay:  score halved every `half_life_days` since the note was written
+    budget: lowest-score notes are dropped until all notes fit in a token budget
+
+Retrieval statistics (`retrieval_count`, `last_retrieved`) are kept on the
+notes by AgenticMemorySystemRB.record_retrieval, which runners call for the
+notes they put into a prompt.
+"""
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+
+def note_age_days(note, now: float) -> float:
+    """Days since the note was written, from its %Y%m%d%H%M timestamp."""
+    try:
+        created = datetime.strptime(str(note.timestamp), "%Y%m%d%H%M").timestamp()
+    except ValueError:
+        return 0.0
+    return max(0.0, (now - created) / 86400.0)
+
+
+def estimate_tokens(*texts: str) -> int:
+    """Rough prompt size of some texts: about 4 characters per token."""
+    return sum(len(text) for text in texts) // 4 + 1
+
+
+def note_tokens(note) -> int:
+    """Prompt size of a note.
+
+    Uses the size recorded when the note was written or indexed, so notes
+    whose fields are loaded lazily are not read just to be measured.
+    """
+    tokens = getattr(note, 'tokens', None)
+    if tokens is None:
+        tokens = estimate_tokens(note.problem_description, note.problem_analysis, note.code)
+    return tokens
+
+
+class EvictionPolicy:
+    """Chooses which memories to forget."""
+
+    name = 'base'
+
+    def select_victims(self, notes_by_category: Dict[str, List], now: Optional[float] = None) -> List[str]:
+        """Return the ids of the notes to delete.
+
+        Args:
+            notes_by_category: category -> notes of that category, in insertion order
+            now: current time in seconds, defaults to time.time()
+        """
+        raise NotImplementedError
+
+
+class PerCategoryPolicy(EvictionPolicy):
+    """Keeps the `target_num` notes of each category that rank highest."""
+
+    def __init__(self, target_num: int = 5):
+        self.target_num = target_num
+
+    def rank(self, note, now: float):
+        """Sort key of a note, higher is kept first."""
+        raise NotImplementedError
+
+    def select_victims(self, notes_by_category, now=None):
+        now = time.time() if now is None else now
+        victims = []
+        for notes in notes_by_category.values():
+            if len(notes) <= self.target_num:
+                continue
+            # stable sort: among equal ranks the earlier note is kept
+            ranked = sorted(notes, key=lambda note: self.rank(note, now), reverse=True)
+            victims.extend(note.id for note in ranked[self.target_num:])
+        return victims
+
+
+class ScorePolicy(PerCategoryPolicy):
+    name = 'score'
+
+    def rank(self, note, now):
+        return note.score
+
+
+class LRUPolicy(PerCategoryPolicy):
+    name = 'lru'
+
+    def rank(self, note, now):
+        # never retrieved notes rank by when they were written
+        return note.last_retrieved or now - note_age_days(note, now) * 86400.0
+
+
+class LFUPolicy(PerCategoryPolicy):
+    name = 'lfu'
+
+    def rank(self, note, now):
+        return (note.retrieval_count, note.last_retrieved or 0.0)
+
+
+class DecayedScorePolicy(PerCategoryPolicy):
+    name = 'decay'
+
+    def __init__(self, target_num: int = 5, half_life_days: float = 30.0):
+        super().__init__(target_num)
+        self.half_life_days = half_life_days
+
+    def rank(self, note, now):
+        return note.score * 0.5 ** (note_age_days(note, now) / self.half_life_days)
+
+
+class BudgetPolicy(EvictionPolicy):
+    """Drops the lowest-score notes until all notes fit in `max_tokens`."""
+
+    name = 'budget'
+
+    def __init__(self, max_tokens: int = 200000):
+        self.max_tokens = max_tokens
+
+    def select_victims(self, notes_by_category, now=None):
+        notes = [note for category_notes in notes_by_category.values() for note in category_notes]
+        sizes = {note.id: note_tokens(note) for note in notes}
+        total = sum(sizes.values())
+        victims = []
+        for note in sorted(notes, key=lambda note: (note.score, note.last_retrieved or 0.0)):
+            if total <= self.max_tokens:
+                break
+            victims.append(note.id)
+            total -= sizes[note.id]
+        return victims
+
+
+EVICTION_POLICIES = {
+    'score': ScorePolicy,
+    'lru': LRUPolicy,
+    'lfu': LFUPolicy,
+    'decay': DecayedScorePolicy,
+    'budget': BudgetPolicy,
+}
+
+
+def build_eviction_policy(name: str = 'score', target_num: int = 5, max_tokens: Optional[int] = None) -> EvictionPolicy:
+    """Create a policy from its name, as used by the --forget_policy flag."""
+    if name not in EVICTION_POLICIES:
+        raise ValueError(f"Unknown eviction policy: {name}, expected one of {list(EVICTION_POLICIES)}")
+    if name == 'budget':
+        return BudgetPolicy(max_tokens) if max_tokens else BudgetPolicy()
+    return EVICTION_POLICIES[name](target_num)
@@ -1,8 +1,9 @@
 from langchain import PromptTemplate, OpenAI, LLMChain
 from langchain.chat_models import ChatOpenAI
+from agents.llm_call import ChainPredictMixin
 
 
-class BaseAgent(object):
+class BaseAgent(ChainPredictMixin):
 
     def __init__(self, name, description, model):
         self.name = name
@@ -91,7 +92,7 @@ Output Rules:
         )
 
     def forward(self, problem_cur, summary_cur, summary_orin):
-        output = self.forward_chain.predict(
+        output = self.predict(
             current_problem=problem_cur,
             current_summary=summary_cur, 
             original_summary=summary_orin,
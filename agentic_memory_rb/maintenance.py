@@ -0,0 +1,102 @@
+"""Background worker for memory bookkeeping.
+
+After a problem is tested, summarizing it, evolving the abstract memories,
+recording the new note, scoring and retrenching all run on the memory
+system before the next problem could start. MemoryMaintenanceWorker takes
+these jobs off the solving path: jobs are queued and applied one at a time
+on a worker thread, in submission order. A job id is only applied once
+(unless it failed), so resubmitting a job when a runner retries a problem
+is harmless.
+A job that raises (e.g. a Summarizer or Evolver call that keeps failing) is
+queued again at the end, up to `max_retries` times; jobs that still fail
+are listed by `failed_jobs()` so runners can report them.
+`flush()` waits for every queued job, retries included, for runs that need
+memory updates to be visible before going on.
+"""
+import atexit
+import queue
+import threading
+import traceback
+from concurrent.futures import Future
+from typing import Callable, Dict
+
+
+class MemoryMaintenanceWorker:
+    """Applies memory-update jobs in order on a single background thread."""
+
+    def __init__(self, name: str = 'memory_maintenance', max_retries: int = 2):
+        self.max_retries = max_retries
+        self._queue = queue.Queue()
+        self._jobs: Dict[str, Future] = {}
+        self._jobs_lock = threading.Lock()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def submit(self, job_id: str, fn: Callable, *args, **kwargs) -> Future:
+        """Queue `fn(*args, **kwargs)` under `job_id`.
+
+        Returns:
+            Future of the job's result. A job id that was already submitted
+            is not queued again, unless that job failed; the existing future
+            is returned instead.
+        """
+        with self._jobs_lock:
+            if self._closed:
+                raise RuntimeError('MemoryMaintenanceWorker is closed')
+            previous = self._jobs.get(job_id)
+            # a job that failed may be submitted again
+            if previous is not None and not (previous.done() and previous.exception() is not None):
+                return previous
+            future = Future()
+            self._jobs[job_id] = future
+            self._queue.put((job_id, future, fn, args, kwargs, 0))
+        return future
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                job_id, future, fn, args, kwargs, attempt = item
+                if attempt == 0 and not future.set_running_or_notify_cancel():
+                    continue
+                try:
+                    future.set_result(fn(*args, **kwargs))
+                except BaseException as e:
+                    print(f'Memory maintenance job {job_id} failed: {type(e).__name__}: {e}')
+                    traceback.print_exc()
+                    if attempt < self.max_retries and isinstance(e, Exception):
+                        print(f'Memory maintenance job {job_id} queued again, retry {attempt + 1}/{self.max_retries}')
+                        self._queue.put((job_id, future, fn, args, kwargs, attempt + 1))
+                    else:
+                        future.set_exception(e)
+            finally:
+                self._queue.task_done()
+
+    def failed_jobs(self) -> Dict[str, BaseException]:
+        """Jobs that failed after all retries, by job id."""
+        with self._jobs_lock:
+            return {job_id: future.exception() for job_id, future in self._jobs.items()
+                    if future.done() and not future.cancelled() and future.exception() is not None}
+
+    def pending(self) -> int:
+        """Number of jobs queued or running."""
+        return self._queue.unfinished_tasks
+
+    def flush(self):
+        """Block until every job submitted so far has been applied."""
+        self._queue.join()
+
+    def close(self):
+        """Apply the remaining jobs and stop the worker thread."""
+        with self._jobs_lock:
+            if self._closed:
+                return
+            self._closed = True
+        # retries are queued behind the jobs, apply them before the stop marker
+        self.flush()
+        self._queue.put(None)
+        self._thread.join()
@@ -5,14 +5,60 @@ import os
 import json
 import random
 import logging
+import threading
+import atexit
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
 try:
     from .retrievers import PersistentChromaRetriever
+    from .embedding_cache import EmbeddingCache
+    from .embedding_models import get_embedding_function
+    from .score_store import MemoryScoreStore
+    from .retention import RetentionHeap
+    from .eviction import EvictionPolicy, ScorePolicy, estimate_tokens
 except:
     from retrievers import PersistentChromaRetriever
+    from embedding_cache import EmbeddingCache
+    from embedding_models import get_embedding_function
+    from score_store import MemoryScoreStore
+    from retention import RetentionHeap
+    from eviction import EvictionPolicy, ScorePolicy, estimate_tokens
 from .llm_controller import Evolver
 
 logger = logging.getLogger(__name__)
 
+# 记忆索引文件，记录每个记忆文件的类型、id、类别和修改时间
+MANIFEST_FILENAME = "_manifest.json"
+MANIFEST_VERSION = 2
+# 记忆分数等小字段单独存放，批量写入，覆盖JSON文件中的值
+SCORE_STORE_FILENAME = "_scores.sqlite3"
+# 懒加载字段在多个线程中首次访问时只读取一次
+_LAZY_LOAD_LOCK = threading.Lock()
+
+def _category_distance(s1: str, s2: str) -> int:
+    # 分割字符串
+    p1 = s1.split('_')
+    p2 = s2.split('_')
+    # 确保每段长度正确
+    if len(p1) != 3 or len(p2) != 3:
+        print("compare string format error")
+        return 5
+    distance = 0
+    # 比较第一段
+    if p1[0] != p2[0]:
+        distance += 1  # MT vs ST
+    # 比较第二段
+    if p1[1] != p2[1]:
+        distance += 1  # MR vs SR
+    # 比较第三段
+    if p1[2] != p2[2]:
+        distance += 3  # IA vs TA
+    return distance
+
+# MRTA分类及其两两距离，预先计算为8x8距离表
+CATEGORIES = [f"{robot}_{task}_{assign}" for robot in ("ST", "MT") for task in ("SR", "MR") for assign in ("IA", "TA")]
+CATEGORY_DISTANCE = {(c1, c2): _category_distance(c1, c2) for c1 in CATEGORIES for c2 in CATEGORIES}
+
 def split_k_to_n(k: int, n: int) -> list:
     base = k // n
     remainder = k % n
@@ -44,6 +90,8 @@ class MemoryNote:
         self.problem_description = problem_description
         self.problem_analysis = problem_analysis
         self.code = code
+        # 记忆的提示词长度，写入索引文件，淘汰时无需读取大字段
+        self.tokens = estimate_tokens(problem_description, problem_analysis, code)
         self.id = str(uuid.uuid4())
         self.index = index or "0"
         self.category = category or "Uncategorized"
@@ -52,6 +100,9 @@ class MemoryNote:
         # 记忆分数
         self.score = 0.0
         self.memory_level = 'specific'
+        # 检索统计，保存在分数库中
+        self.retrieval_count = 0
+        self.last_retrieved = None
 
     def to_dict(self) -> Dict:
         """Convert the memory note to a dictionary for serialization."""
@@ -100,6 +151,8 @@ class MemoryNote:
             return False
 
     def delete_as_json(self,dir_complete:str) -> bool:
+        # 其他线程可能仍持有该记忆，删除文件前先读入懒加载字段
+        self.load_lazy_fields()
         try:
             file_path = os.path.join(dir_complete, f"{self.id}.json")
             if os.path.exists(file_path):
@@ -115,23 +168,76 @@ class MemoryNote:
         try:
             with open(filepath, 'r', encoding='utf-8',errors="ignore") as f:
                 data = json.load(f)
-            self.memory_level = data.get("memory_level","null")
-            if self.memory_level != 'specific':
-                return False
-            self.id = data.get("id", "")
-            self.index = data.get("index", "0")
-            self.problem_description = data.get("problem_description", "null")
-            self.problem_analysis = data.get("problem_analysis", "null")
-            self.code = data.get("code", "null")
-            self.category = data.get("category", "Uncategorized")
-            self.timestamp = data.get("timestamp", "")
-            self.score = data.get("score", 0.0)
-
-            return True
+            return self.load_from_dict(data)
         except Exception as e:
             print(f"Error loading memory: {e}")
             return False
 
+    def load_from_dict(self, data: Dict) -> bool:
+        """Load a memory note from a parsed JSON dictionary."""
+        self.memory_level = data.get("memory_level","null")
+        if self.memory_level != 'specific':
+            return False
+        self.id = data.get("id", "")
+        self.index = data.get("index", "0")
+        self.problem_description = data.get("problem_description", "null")
+        self.problem_analysis = data.get("problem_analysis", "null")
+        self.code = data.get("code", "null")
+        self.tokens = estimate_tokens(self.problem_description, self.problem_analysis, self.code)
+        self.category = data.get("category", "Uncategorized")
+        self.timestamp = data.get("timestamp", "")
+        self.score = data.get("score", 0.0)
+        return True
+
+    # 大字段在首次访问时才从JSON文件读取
+    _LAZY_FIELDS = ("problem_description", "problem_analysis", "code")
+
+    @classmethod
+    def from_manifest(cls, entry: Dict, filepath: str) -> "MemoryNote":
+        """Create a note from its manifest entry without reading the JSON file.
+
+        problem_description, problem_analysis and code are read from
+        `filepath` the first time one of them is accessed.
+        """
+        note = cls.__new__(cls)
+        note.id = entry["id"]
+        note.index = entry.get("index", "0")
+        note.category = entry.get("category", "Uncategorized")
+        note.timestamp = entry.get("timestamp", "")
+        note.score = entry.get("score", 0.0)
+        note.tokens = entry.get("tokens")
+        note.memory_level = 'specific'
+        note.retrieval_count = 0
+        note.last_retrieved = None
+        note._source_path = filepath
+        return note
+
+    def load_lazy_fields(self):
+        """Read the lazy fields from the JSON file if they are not loaded yet.
+
+        A file that is missing or unreadable leaves the defaults of load_from_dict.
+        """
+        with _LAZY_LOAD_LOCK:
+            source_path = self.__dict__.get("_source_path")
+            if source_path is None:
+                return
+            data = {}
+            try:
+                with open(source_path, 'r', encoding='utf-8', errors="ignore") as f:
+                    data = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Cannot load memory fields of {self.id} from {source_path}: {e}")
+            for field in MemoryNote._LAZY_FIELDS:
+                self.__dict__.setdefault(field, data.get(field, "null"))
+            del self.__dict__["_source_path"]
+
+    def __getattr__(self, name):
+        # only called when normal attribute lookup fails, i.e. for unloaded lazy fields
+        if name in MemoryNote._LAZY_FIELDS and "_source_path" in self.__dict__:
+            self.load_lazy_fields()
+            return self.__dict__[name]
+        raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+
 class AbstructMemoryNote:
     def __init__(self,
                  resolve_summary:str,
@@ -140,6 +246,8 @@ class AbstructMemoryNote:
         self.id = str(uuid.uuid4())
         self.category = category
         self.memory_level = 'abstruct'
+        # 每次进化成功后加一，用于丢弃基于旧版本的进化结果
+        self.version = 0
     
     def to_dict(self) -> Dict:
         """Convert the memory note to a dictionary for serialization."""
@@ -148,6 +256,7 @@ class AbstructMemoryNote:
             "resolve_summary": self.resolve_summary,
             "category": self.category,
             "memory_level":self.memory_level,
+            "version": self.version,
         }    
 
     def save_as_json(self,dir_name:Optional[str]=None) -> bool:
@@ -198,28 +307,45 @@ class AbstructMemoryNote:
         try:
             with open(filepath, 'r', encoding='utf-8',errors="ignore") as f:
                 data = json.load(f)
-            self.memory_level = data.get("memory_level","null")
-            if self.memory_level != 'abstruct':
-                return False
-            self.id = data.get("id", "")
-            self.resolve_summary = data.get("resolve_summary", "null")
-            self.category = data.get("category", "Uncategorized")
-            return True
+            return self.load_from_dict(data)
         except Exception as e:
             print(f"Error loading memory: {e}")
             return False
 
+    def load_from_dict(self, data: Dict) -> bool:
+        """Load a memory note from a parsed JSON dictionary."""
+        self.memory_level = data.get("memory_level","null")
+        if self.memory_level != 'abstruct':
+            return False
+        self.id = data.get("id", "")
+        self.resolve_summary = data.get("resolve_summary", "null")
+        self.category = data.get("category", "Uncategorized")
+        self.version = int(data.get("version", 0))
+        return True
+
 class AgenticMemorySystemRB:
     """A memory system for storing and retrieving programming problem solutions and analyses.
     
     This class provides methods to add, retrieve, and organize programming-related memories.
     """
     
-    def __init__(self,dir_memory:Optional[str],model_name:Optional[str]=None,llm_name:Optional[str]=None,category_abstruct_memory_num=1):
+    def __init__(self,dir_memory:Optional[str],model_name:Optional[str]=None,llm_name:Optional[str]=None,category_abstruct_memory_num=1,embedding_cache_dir:Optional[str]="embedding_cache",embedding_backend:Optional[str]=None,evolve_workers:int=4,eviction_policy:Optional[EvictionPolicy]=None):
         self.memories = {}
         self.abstruct_memories = {}
+        # 类别索引: category -> {memory_id: None}，保持插入顺序
+        self._category_index = {}
+        # 每个类别按分数维护的最小堆，用于遗忘低分记忆
+        self._retention = RetentionHeap()
+        # 遗忘策略，默认每个类别保留分数最高的5条记忆
+        self.eviction_policy = eviction_policy or ScorePolicy(target_num=5)
+        self._abstruct_category_index = {}
         self.category_abstruct_memory_num = category_abstruct_memory_num
         self.dir_memory = dir_memory
+        # 保护抽象记忆的读取、增删和进化结果的写回
+        self._abstruct_lock = threading.RLock()
+        # 并行调用进化器；后台进化任务单线程按提交顺序执行
+        self._evolve_executor = ThreadPoolExecutor(max_workers=max(1, evolve_workers), thread_name_prefix='evolve')
+        self._background_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='evolve_bg')
         
         if model_name:
             self.model_name = model_name
@@ -235,10 +361,21 @@ class AgenticMemorySystemRB:
         self.dir_memory_complete = memory_dir
 
         # 自动拾取先前的记忆json文件
-        self.process_memory("memory")
+        self._manifest = {}
+        self.process_memory(self.dir_memory)
+        self.score_store = MemoryScoreStore(os.path.join(memory_dir, SCORE_STORE_FILENAME))
+        atexit.register(self.score_store.close)
+        self._apply_stored_fields()
+
+        # 持久化的向量缓存，放在记忆目录之外，重置记忆库后仍可复用；None 表示不使用
+        # 不同后端的向量略有差异，分开缓存
+        embedding_function = get_embedding_function(self.model_name, embedding_backend)
+        self.embedding_cache = None
+        if embedding_cache_dir:
+            self.embedding_cache = EmbeddingCache(os.path.join(current_dir, embedding_cache_dir), embedding_function.cache_name)
 
         # 加载ChromaDB持久化存储的记忆，自动拾取先前的记忆
-        self.retriever = PersistentChromaRetriever(collection_name="memories",model_name=self.model_name,directory=memory_dir,extend=True)
+        self.retriever = PersistentChromaRetriever(collection_name="memories",model_name=self.model_name,directory=memory_dir,extend=True,embedding_cache=self.embedding_cache,embedding_backend=embedding_function.backend)
 
         # 准备进化器
         if llm_name == None:
@@ -250,7 +387,7 @@ class AgenticMemorySystemRB:
         # 增加新的记忆
         note = MemoryNote(problem_description=description,problem_analysis=analysis, code=code,
                           category=category ,**kwargs)
-        self.memories[note.id] = note
+        self._register_note(note)
         self.save_memory_single(note.id,"memory")
         # Convert MemoryNote object to serializable format
         note_json_data = {"description":note.problem_description,"category":note.category}
@@ -259,10 +396,42 @@ class AgenticMemorySystemRB:
         self.retriever.add_document(document=description, metadata=note_json_data, doc_id=note.id)
         return note.id
     
+    def add_notes_bulk(self, notes: List[Dict], batch_size: int = 64) -> List[str]:
+        """Add many memory notes at once.
+
+        Args:
+            notes: list of dicts with keys description, analysis, code and category
+            batch_size: number of descriptions embedded per model call
+
+        Returns:
+            List of new note ids, in input order
+        """
+        start_time = datetime.now()
+        new_notes = [MemoryNote(problem_description=n["description"], problem_analysis=n["analysis"],
+                                code=n["code"], category=n["category"]) for n in notes]
+        if len(new_notes) == 0:
+            return []
+        # 先写入ChromaDB，成功后再写JSON文件
+        stats = self.retriever.add_documents(
+            documents=[note.problem_description for note in new_notes],
+            metadatas=[{"description": note.problem_description, "category": note.category} for note in new_notes],
+            doc_ids=[note.id for note in new_notes],
+            batch_size=batch_size,
+        )
+        for note in new_notes:
+            self._register_note(note)
+            self.save_memory_single(note.id, self.dir_memory)
+        total_time = (datetime.now() - start_time).total_seconds()
+        print(f"Added {len(new_notes)} notes in {total_time:.2f}s "
+              f"({len(new_notes) / max(total_time, 1e-6):.1f} notes/s, "
+              f"embedding {stats['embed_seconds']:.2f}s, chroma {stats['write_seconds']:.2f}s)")
+        return [note.id for note in new_notes]
+
     def add_abstruct_note(self, summary: str, category, **kwargs) -> str:
         abstruct_note = AbstructMemoryNote(resolve_summary=summary,category=category)
-        self.abstruct_memories[abstruct_note.id] = abstruct_note
-        self.save_abstruct_memory_single(abstruct_note.id,"memory")
+        with self._abstruct_lock:
+            self._register_abstruct_note(abstruct_note)
+            self.save_abstruct_memory_single(abstruct_note.id,"memory")
         return abstruct_note.id
 
     def delete_note(self, memory_id: str) -> bool:
@@ -274,17 +443,26 @@ class AgenticMemorySystemRB:
         Returns:
             bool: True if memory was deleted, False if not found
         """
-        # 删除记忆，包括ChromaDB和本地存储
+        return self.delete_notes([memory_id]) == 1
 
-        if memory_id in self.memories:
-            # Delete from ChromaDB
-            self.retriever.delete_document(memory_id)
+    def delete_notes(self, memory_ids: List[str]) -> int:
+        """Delete memory notes, with a single ChromaDB delete for all of them.
+
+        Returns:
+            int: number of notes that existed and were deleted
+        """
+        # 删除记忆，包括ChromaDB和本地存储
+        memory_ids = [memory_id for memory_id in dict.fromkeys(memory_ids) if memory_id in self.memories]
+        if not memory_ids:
+            return 0
+        # Delete from ChromaDB
+        self.retriever.delete_documents(memory_ids)
+        for memory_id in memory_ids:
             # Delete from local storage
             self.memories[memory_id].delete_as_json(dir_complete=self.dir_memory_complete)
-            del self.memories[memory_id]
-            self.retriever.delete_document(memory_id)
-            return True
-        return False
+            self._unregister_note(memory_id)
+            self.score_store.delete(memory_id)
+        return len(memory_ids)
     
     def delete_abstruct_note(self, memory_id: str) -> bool:
         """Delete a memory note by its ID.
@@ -297,19 +475,78 @@ class AgenticMemorySystemRB:
         """
         # 删除记忆，包括ChromaDB和本地存储
 
-        if memory_id in self.abstruct_memories:
-            # Delete from local storage
-            self.abstruct_memories[memory_id].delete_as_json(dir_complete=self.dir_memory_complete)
-            del self.abstruct_memories[memory_id]
-            return True
+        with self._abstruct_lock:
+            if memory_id in self.abstruct_memories:
+                # Delete from local storage
+                self.abstruct_memories[memory_id].delete_as_json(dir_complete=self.dir_memory_complete)
+                self._unregister_abstruct_note(memory_id)
+                return True
         return False
     
+    def _register_note(self, note: MemoryNote) -> None:
+        """Add a note to self.memories and the category index."""
+        self._unregister_note(note.id)
+        self.memories[note.id] = note
+        self._category_index.setdefault(note.category, {})[note.id] = None
+        self._retention.push(note.id, note.category, note.score)
+
+    def _unregister_note(self, memory_id: str) -> None:
+        note = self.memories.pop(memory_id, None)
+        if note is None:
+            return
+        self._retention.remove(memory_id)
+        ids = self._category_index.get(note.category)
+        if ids is not None:
+            ids.pop(memory_id, None)
+            if len(ids) == 0:
+                del self._category_index[note.category]
+
+    def _register_abstruct_note(self, note: AbstructMemoryNote) -> None:
+        self._unregister_abstruct_note(note.id)
+        self.abstruct_memories[note.id] = note
+        self._abstruct_category_index.setdefault(note.category, {})[note.id] = None
+
+    def _unregister_abstruct_note(self, memory_id: str) -> None:
+        note = self.abstruct_memories.pop(memory_id, None)
+        if note is None:
+            return
+        ids = self._abstruct_category_index.get(note.category)
+        if ids is not None:
+            ids.pop(memory_id, None)
+            if len(ids) == 0:
+                del self._abstruct_category_index[note.category]
+
+    def _categories_at_distance(self, index: Dict, current_catogory: str, desired_dis: int) -> List[str]:
+        """Indexed categories whose distance to current_catogory equals desired_dis."""
+        return [category for category in index
+                if self._catogory_distance(current_catogory, category) == desired_dis]
+
     def save_memory(self, dir_name:Optional[str]=None) -> None:
         """Save all memories to JSON files"""
         # 将当前记忆保存，不会保存重复记忆
         for memory in self.memories.values():
             memory.save_as_json(dir_name)
 
+    def _apply_stored_fields(self) -> None:
+        """Override note fields loaded from JSON with the values in the score store."""
+        for memory_id, fields in self.score_store.load().items():
+            memory = self.memories.get(memory_id)
+            if memory is not None:
+                for key, value in fields.items():
+                    setattr(memory, key, value)
+                self._retention.push(memory_id, memory.category, memory.score)
+
+    def _set_score(self, memory_id: str, score: float) -> None:
+        """Change the score of a note and queue it for the score store."""
+        memory = self.memories[memory_id]
+        memory.score = score
+        self._retention.push(memory_id, memory.category, score)
+        self.score_store.update(memory_id, score=score)
+
+    def flush(self) -> None:
+        """Write buffered score updates to disk."""
+        self.score_store.flush()
+
     def save_memory_single(self, memory_id: str , dir_name:Optional[str]=None) -> None:
         self.memories[memory_id].save_as_json(dir_name)
 
@@ -317,31 +554,100 @@ class AgenticMemorySystemRB:
         self.abstruct_memories[memory_id].save_as_json(dir_name)
  
     def process_memory(self,dir_name:Optional[str]=None) -> None:
+        """Load memory notes from the memory folder.
+
+        The manifest file records the type, id, category and mtime of every
+        note file, and the prompt size of specific notes. Files that are unchanged since the manifest was written
+        are not parsed: notes that are already loaded are kept, and new
+        specific notes are created from the manifest with their large fields
+        loaded lazily. Every other file is parsed once.
+        """
         # 从当前文件夹的memory子文件夹加载记忆
         current_dir = os.path.dirname(os.path.abspath(__file__))
         if dir_name:
             memory_dir = os.path.join(current_dir, dir_name)
         else:
             memory_dir = os.path.join(current_dir, "memory")
+        manifest_path = os.path.join(memory_dir, MANIFEST_FILENAME)
+        manifest = self._manifest or self._read_manifest(manifest_path)
+        new_manifest = {}
+        parsed_num = 0
         file_paths = self._list_all_jsonfiles(memory_dir)
         for file_path in file_paths:
-            note = MemoryNote(problem_description="null",problem_analysis="null", code="null",
-                          category="null")
-            abstruct_note = AbstructMemoryNote(resolve_summary='null',
-                            category='null')
-            if note.load_from_json(file_path):
-                self.memories[note.id] = note
-            if abstruct_note.load_from_json(file_path):
-                self.abstruct_memories[abstruct_note.id] = abstruct_note
-        
+            rel_path = os.path.relpath(file_path, memory_dir)
+            stat = os.stat(file_path)
+            entry = manifest.get(rel_path)
+            if entry is not None and entry["mtime"] == stat.st_mtime and entry["size"] == stat.st_size:
+                new_manifest[rel_path] = entry
+                if entry["memory_level"] == 'specific' and entry["id"] not in self.memories:
+                    self._register_note(MemoryNote.from_manifest(entry, file_path))
+                    continue
+                if entry["memory_level"] != 'abstruct' or entry["id"] in self.abstruct_memories:
+                    continue
+            try:
+                with open(file_path, 'r', encoding='utf-8',errors="ignore") as f:
+                    data = json.load(f)
+            except Exception as e:
+                print(f"Error loading memory: {e}")
+                continue
+            parsed_num += 1
+            entry = {"id": data.get("id", ""), "memory_level": data.get("memory_level", "null"),
+                     "category": data.get("category", "Uncategorized"),
+                     "mtime": stat.st_mtime, "size": stat.st_size}
+            if entry["memory_level"] == 'specific':
+                note = MemoryNote(problem_description="null",problem_analysis="null", code="null",
+                              category="null")
+                note.load_from_dict(data)
+                self._register_note(note)
+                entry.update(index=note.index, timestamp=note.timestamp, score=note.score, tokens=note.tokens)
+            elif entry["memory_level"] == 'abstruct':
+                abstruct_note = AbstructMemoryNote(resolve_summary='null',
+                                category='null')
+                abstruct_note.load_from_dict(data)
+                self._register_abstruct_note(abstruct_note)
+            new_manifest[rel_path] = entry
+
+        # 清除文件已被删除的记忆
+        for rel_path, entry in manifest.items():
+            if rel_path not in new_manifest:
+                self._unregister_note(entry["id"])
+                self._unregister_abstruct_note(entry["id"])
+
+        if new_manifest != manifest or not os.path.exists(manifest_path):
+            self._write_manifest(manifest_path, new_manifest)
+        self._manifest = new_manifest
+        print(f"Loaded memory from {memory_dir}: {len(self.memories)} specific, "
+              f"{len(self.abstruct_memories)} abstruct, {parsed_num} files parsed")
+
+    def _read_manifest(self, manifest_path: str) -> Dict:
+        try:
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get("version") != MANIFEST_VERSION:
+                return {}
+            return data.get("files", {})
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            print(f"Error reading memory manifest, rebuilding it: {e}")
+            return {}
+
+    def _write_manifest(self, manifest_path: str, files: Dict) -> None:
+        os.makedirs(os.path.dirname(manifest_path), exist_ok=True)
+        tmp_path = manifest_path + ".tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({"version": MANIFEST_VERSION, "files": files}, f, ensure_ascii=False)
+            os.replace(tmp_path, manifest_path)
+        except Exception as e:
+            print(f"Error writing memory manifest: {e}")
+
 
     def select_memory_bycatogory_distance(self , current_catogory:str , desired_dis : int , k : int) -> List[MemoryNote]:
         """Select a memory by catogory with desired distance"""
         selected_memories = []
-        for memory in self.memories.values():
-            distance = self._catogory_distance(current_catogory, memory.category)
-            if distance == desired_dis:
-                selected_memories.append(memory)
+        for category in self._categories_at_distance(self._category_index, current_catogory, desired_dis):
+            selected_memories.extend(self.memories[memory_id] for memory_id in self._category_index[category])
         
         #random.shuffle(selected_memories)
         return selected_memories
@@ -352,36 +658,89 @@ class AgenticMemorySystemRB:
             selected_memories = self.select_memory_bycatogory_distance(current_catogory, desired_dis, k)
             if len(selected_memories) > 0:
                 if len(selected_memories) >= k:
-                    return selected_memories[:k]
-                else:
-                    return selected_memories
+                    selected_memories = selected_memories[:k]
+                return selected_memories
                 
-    def select_memory_bycatogory_content(self , description:str , current_catogory:str , k : int , tolerance_level : Optional[int]) -> List[MemoryNote]:
+    def _plan_content_search(self, current_catogory:str, k:int, tolerance_level:Optional[int]):
+        """Pick the candidate categories of a content search.
+
+        Returns (memories, categories): when `categories` is None no vector
+        search is needed and `memories` is the answer, otherwise k is split
+        over `categories` and each one is searched by content.
+        """
         level = tolerance_level if tolerance_level is not None else 1
         for desired_dis in range(0,level+1):
             selected_memories = self.select_memory_bycatogory_distance(current_catogory, desired_dis, k)
             if len(selected_memories) > 0:
                 if len(selected_memories) >= k:
-                    reselect_memories = []
-                    categories = {memory.category for memory in selected_memories}
-                    category_num = len(categories)
-                    assignment_list = split_k_to_n(k,category_num)
-                    for i,category_i in enumerate(categories):
-                        results = self.retriever.search_bycatogory(description,category_i,assignment_list[i])
-                        results = results['ids'][0]
-                        #print("----xytest----")
-                        #print(results)
-                        if len(results) < assignment_list[i]:
-                            assignment_list[i+1] += assignment_list[i] - len(results)
-                        for id in results:
-                            reselect_memories.append(self.memories[id])
-
-                    #selected_memories = sorted(selected_memories, key=lambda memory: self.retriever.search(memory.problem_description, k=1)['distances'][0][0])
-                    return reselect_memories
+                    categories = list(dict.fromkeys(memory.category for memory in selected_memories))
+                    return selected_memories, categories
                 else:
-                    return selected_memories
+                    return selected_memories, None
             else:
-                return selected_memories
+                return selected_memories, None
+        return [], None
+
+    def _assign_content_results(self, categories:List[str], k:int, results:List[List[str]]) -> List[MemoryNote]:
+        """Take k memories from per-category search results.
+
+        Each category gets its share of k; a category with too few results
+        passes the rest of its share on to the next one.
+        """
+        reselect_memories = []
+        assignment_list = split_k_to_n(k,len(categories))
+        carry = 0
+        for i, ids in enumerate(results):
+            quota = assignment_list[i] + carry
+            ids = [memory_id for memory_id in ids if memory_id in self.memories][:quota]
+            carry = quota - len(ids)
+            reselect_memories.extend(self.memories[memory_id] for memory_id in ids)
+        return reselect_memories
+
+    def select_memory_bycatogory_content(self , description:str , current_catogory:str , k : int , tolerance_level : Optional[int]) -> List[MemoryNote]:
+        return self.select_memory_bycatogory_content_batch([description], [current_catogory], k, tolerance_level)[0]
+
+    def select_memory_bycatogory_content_batch(self , descriptions:List[str] , current_catogories:List[str] , k : int , tolerance_level : Optional[int]) -> List[List[MemoryNote]]:
+        """select_memory_bycatogory_content for many problems with one retriever call.
+
+        All (problem, category) searches are embedded and queried together,
+        which lets batch runners fetch the memories of a whole dataset split
+        at once.
+        """
+        plans = [self._plan_content_search(catogory, k, tolerance_level) for catogory in current_catogories]
+        queries, filters, owners = [], [], []
+        for i, (_, categories) in enumerate(plans):
+            if categories is None:
+                continue
+            for category in categories:
+                queries.append(descriptions[i])
+                filters.append({"category": category})
+                owners.append(i)
+        # ask every category for k results so shortfalls can be carried over
+        results = self.retriever.search_batch(queries, k, filters) if queries else []
+
+        per_problem = {}
+        for owner, result in zip(owners, results):
+            per_problem.setdefault(owner, []).append(result["ids"])
+        selected = []
+        for i, (selected_memories, categories) in enumerate(plans):
+            if categories is None:
+                selected.append(selected_memories)
+            else:
+                selected.append(self._assign_content_results(categories, k, per_problem.get(i, [])))
+        return selected
+
+    def record_retrieval(self, memories:List[MemoryNote]) -> None:
+        """Count a retrieval of each note, for the lru and lfu eviction policies.
+
+        Selecting notes does not count: runners call this for the notes they
+        actually put into a prompt.
+        """
+        now = time.time()
+        for memory in memories:
+            memory.retrieval_count += 1
+            memory.last_retrieved = now
+            self.score_store.update(memory.id, retrieval_count=memory.retrieval_count, last_retrieved=now)
                 
     def scoring_memory_bynewnote(self, new_note_id , addscore_num = Optional[int]):
         description = self.memories[new_note_id].problem_description
@@ -395,8 +754,7 @@ class AgenticMemorySystemRB:
             if memory_id != new_note_id:
                 if memory_id in self.memories:
                     print(f'test add score {memory_id}')
-                    self.memories[memory_id].score += 1.0
-                    self.save_memory_single(memory_id,self.dir_memory)
+                    self._set_score(memory_id, self.memories[memory_id].score + 1.0)
         '''    
         for result in results:
             memory_id = result['id']
@@ -410,44 +768,43 @@ class AgenticMemorySystemRB:
             return
         # 按分数排序并保留前target_num个记忆
         sorted_memories = sorted(self.memories.items(), key=lambda item: item[1].score, reverse=True)
-        top_memories = dict(sorted_memories[:target_num])
         # 删除低分记忆
         low_score_memories = dict(sorted_memories[target_num:])
-        for memory_id in low_score_memories.keys():
-            self.delete_note(memory_id)
-        self.memories = top_memories
+        self.delete_notes(list(low_score_memories.keys()))
 
     def retrenching_memory_byscore(self, target_num : int):
-        catogory_set=set()
-        for key in self.memories.keys():
-            catogory_set.add(self.memories[key].category)
-        memory_dict = {item:[] for item in catogory_set}
-        for key in self.memories.keys():
-            memory_dict[self.memories[key].category].append(self.memories[key])
-        # 按类别分配记忆
-        for catogory in memory_dict.keys():
-            memories_in_catogory = memory_dict[catogory]
-            if len(memories_in_catogory) <= target_num:
-                continue
-            # 按分数排序并保留前target_num个记忆
-            sorted_memories = sorted(memories_in_catogory, key=lambda item: item.score, reverse=True)
-            top_memories = sorted_memories[:target_num]
-            low_score_memories = sorted_memories[target_num:]
-            for memory in low_score_memories:
-                self.delete_note(memory.id)
-            memory_dict[catogory] = top_memories
-        # 重建记忆库
-        self.memories = {}
-        for catogory in memory_dict.keys():
-            for memory in memory_dict[catogory]:
-                self.memories[memory.id] = memory
+        """Keep the target_num highest-scored memories of every category.
+
+        Among equal scores the earlier memory is kept. The low-score memories
+        come off the per-category retention heaps and are deleted together.
+        """
+        low_score_ids = []
+        for catogory in self._retention.categories():
+            excess = self._retention.size(catogory) - target_num
+            if excess > 0:
+                low_score_ids.extend(self._retention.pop_lowest(catogory, excess))
+        self.delete_notes(low_score_ids)
         
+    def forget(self, policy:Optional[EvictionPolicy]=None) -> int:
+        """Delete the memories `policy` (default self.eviction_policy) chooses to drop.
+
+        Returns:
+            int: number of deleted memories
+        """
+        policy = policy or self.eviction_policy
+        if type(policy) is ScorePolicy:
+            # 分数策略直接使用保留堆
+            before = len(self.memories)
+            self.retrenching_memory_byscore(policy.target_num)
+            return before - len(self.memories)
+        notes_by_category = {category: [self.memories[memory_id] for memory_id in ids]
+                             for category, ids in self._category_index.items()}
+        return self.delete_notes(policy.select_victims(notes_by_category))
+
     def select_abstruct_memory_bycatogory(self , current_category):
-        selected_abstruct_memory=[]
-        for memory in self.abstruct_memories.values():
-            if memory.category == current_category:
-                selected_abstruct_memory.append(memory)
-        return selected_abstruct_memory
+        with self._abstruct_lock:
+            ids = self._abstruct_category_index.get(current_category, {})
+            return [self.abstruct_memories[memory_id] for memory_id in ids]
     
     def select_abstruct_memory_bycatogory_distance(self , current_category , test_shift=False , target_num = 2 , tolerance_level=2):
         selected_abstruct_memory=[]
@@ -455,50 +812,72 @@ class AgenticMemorySystemRB:
         #     if memory.category == current_category:
         #         selected_abstruct_memory.append(memory)
         start_level = 1 if test_shift else 0
-        for level in range(start_level,tolerance_level+1):
-            for memory in self.abstruct_memories.values():
-                if self._catogory_distance(memory.category,current_category)==level:
-                    selected_abstruct_memory.append(memory)
-            if len(selected_abstruct_memory)>=target_num:
-                break
+        with self._abstruct_lock:
+            for level in range(start_level,tolerance_level+1):
+                for category in self._categories_at_distance(self._abstruct_category_index, current_category, level):
+                    selected_abstruct_memory.extend(
+                        self.abstruct_memories[memory_id] for memory_id in self._abstruct_category_index[category])
+                if len(selected_abstruct_memory)>=target_num:
+                    break
         random.shuffle(selected_abstruct_memory)
         return selected_abstruct_memory
     
     def evolving_abstruct_memory(self, description:str , summary:str , category:str ):
-        selected_memory = self.select_abstruct_memory_bycatogory(category)
+        """Evolve every abstract memory of `category` with a new summary.
+
+        The evolver is called for all notes concurrently. Each result is only
+        written back if its note has not been evolved since it was read,
+        so a slow evolution cannot overwrite a newer summary.
+
+        Returns:
+            The renewed summary of the last note, None if nothing was evolved
+        """
+        with self._abstruct_lock:
+            selected_memory = [(memory.id, memory.version, memory.resolve_summary)
+                               for memory in self.select_abstruct_memory_bycatogory(category)]
         if len(selected_memory)==0:
             return
         print('---evolving memory---')
         print(f'evolving {len(selected_memory)} memories!')
         print('---------------------')    
-        for memory in selected_memory:
-            id=memory.id
-            orin_sum = self.abstruct_memories[id].resolve_summary
-            renew_sum = self.evolver.forward(description,summary,orin_sum)
-            self.abstruct_memories[id].resolve_summary = renew_sum
-            self.save_abstruct_memory_single(id,"memory")
+        futures = [self._evolve_executor.submit(self.evolver.forward, description, summary, orin_sum)
+                   for _, _, orin_sum in selected_memory]
+        renew_sum = None
+        for (id, version, _), future in zip(selected_memory, futures):
+            renew_sum = future.result()
+            self._apply_evolved_summary(id, version, renew_sum)
         
         return renew_sum
 
+    def _apply_evolved_summary(self, memory_id:str , base_version:int , renew_sum:str) -> bool:
+        """Write back an evolved summary if the note is still at `base_version`."""
+        with self._abstruct_lock:
+            memory = self.abstruct_memories.get(memory_id)
+            if memory is None:
+                print(f'abstruct memory {memory_id} was deleted during evolution, result dropped')
+                return False
+            if memory.version != base_version:
+                print(f'abstruct memory {memory_id} was evolved to version {memory.version} '
+                      f'meanwhile, result based on version {base_version} dropped')
+                return False
+            memory.resolve_summary = renew_sum
+            memory.version += 1
+            self.save_abstruct_memory_single(memory_id,"memory")
+            return True
+
+    def submit_evolving_abstruct_memory(self, description:str , summary:str , category:str ) -> Future:
+        """Run evolving_abstruct_memory in the background.
+
+        Jobs run one at a time in submission order, off the caller's thread.
+        The returned future resolves to the result of evolving_abstruct_memory.
+        """
+        return self._background_executor.submit(self.evolving_abstruct_memory, description, summary, category)
+
 
     def _catogory_distance(self,s1:str, s2:str) -> int:
-        # 分割字符串
-        p1 = s1.split('_')
-        p2 = s2.split('_')
-        # 确保每段长度正确
-        if len(p1) != 3 or len(p2) != 3:
-            print("compare string format error")
-            return 5
-        distance = 0
-        # 比较第一段
-        if p1[0] != p2[0]:
-            distance += 1  # MT vs ST
-        # 比较第二段
-        if p1[1] != p2[1]:
-            distance += 1  # MR vs SR
-        # 比较第三段
-        if p1[2] != p2[2]:
-            distance += 3  # IA vs TA
+        distance = CATEGORY_DISTANCE.get((s1, s2))
+        if distance is None:
+            distance = _category_distance(s1, s2)
         return distance
     
     def _list_all_jsonfiles(self,directory):
@@ -514,7 +893,7 @@ class AgenticMemorySystemRB:
         for root, dirs, files in os.walk(directory):
             for file in files:
                 # 拼接完整路径
-                if file.lower().endswith('.json'):
+                if file.lower().endswith('.json') and file != MANIFEST_FILENAME:
                     file_path = os.path.join(root, file)
                     file_paths.append(file_path)
     
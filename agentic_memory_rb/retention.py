@@ -0,0 +1,82 @@
+"""Per-category retention heaps for forgetting low-score memories.
+
+Each category keeps a min-heap of (score, -order, id), where `order` is the
+position at which the note was first added. The top of a heap is the note
+that retrenching drops first: the lowest score, and among equal scores the
+most recently added one, matching the stable sort the memory system used
+before. Score changes push a new entry and leave the old one in place;
+stale entries are skipped when popped and cleared out when a heap grows to
+twice its live size. Adding, rescoring and evicting a note cost O(log n).
+"""
+import heapq
+import itertools
+from typing import Dict, List, Tuple
+
+
+class RetentionHeap:
+    """Min-heaps of note scores, one per category, with lazy invalidation."""
+
+    def __init__(self):
+        self._heaps: Dict[str, List[Tuple[float, int, str]]] = {}
+        # id -> (score, order, category) of the live entry
+        self._entries: Dict[str, Tuple[float, int, str]] = {}
+        self._sizes: Dict[str, int] = {}
+        self._order = itertools.count()
+
+    def __contains__(self, note_id: str) -> bool:
+        return note_id in self._entries
+
+    def push(self, note_id: str, category: str, score: float):
+        """Add a note, or update its score or category."""
+        previous = self._entries.get(note_id)
+        if previous is not None and previous[2] != category:
+            self.remove(note_id)
+            previous = None
+        if previous is None:
+            order = next(self._order)
+            self._sizes[category] = self._sizes.get(category, 0) + 1
+        else:
+            order = previous[1]
+        score = float(score)
+        self._entries[note_id] = (score, order, category)
+        heap = self._heaps.setdefault(category, [])
+        heapq.heappush(heap, (score, -order, note_id))
+        if len(heap) > 2 * self._sizes[category] + 16:
+            self._compact(category)
+
+    def remove(self, note_id: str):
+        entry = self._entries.pop(note_id, None)
+        if entry is None:
+            return
+        category = entry[2]
+        self._sizes[category] -= 1
+        if self._sizes[category] == 0:
+            del self._sizes[category]
+            self._heaps.pop(category, None)
+
+    def size(self, category: str) -> int:
+        return self._sizes.get(category, 0)
+
+    def categories(self) -> List[str]:
+        return list(self._sizes)
+
+    def _is_live(self, item: Tuple[float, int, str]) -> bool:
+        score, neg_order, note_id = item
+        entry = self._entries.get(note_id)
+        return entry is not None and entry[0] == score and entry[1] == -neg_order
+
+    def _compact(self, category: str):
+        heap = [item for item in self._heaps.get(category, []) if self._is_live(item)]
+        heapq.heapify(heap)
+        self._heaps[category] = heap
+
+    def pop_lowest(self, category: str, n: int) -> List[str]:
+        """Remove and return the ids of the `n` notes to drop first in `category`."""
+        popped = []
+        heap = self._heaps.get(category, [])
+        while heap and len(popped) < n:
+            item = heapq.heappop(heap)
+            if self._is_live(item):
+                popped.append(item[2])
+                self.remove(item[2])
+        return popped
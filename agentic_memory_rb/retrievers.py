@@ -1,15 +1,23 @@
 import json
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Union
 import ast
 import tempfile
 import atexit
+import sqlite3
+from contextlib import closing
 
 import chromadb
 from chromadb.config import Settings
-from chromadb.utils.embedding_functions import SentenceTransformerEmbeddingFunction
 from nltk.tokenize import word_tokenize
 
+try:
+    from .embedding_cache import EmbeddingCache
+    from .embedding_models import get_embedding_function
+except ImportError:
+    from embedding_cache import EmbeddingCache
+    from embedding_models import get_embedding_function
+
 from datetime import datetime
 import shutil
 
@@ -41,27 +49,78 @@ def _clone_collection(
             embeddings=batch["embeddings"])
 
 
+def _snapshot_chroma_directory(src: Path, dest: Path):
+    """
+    Copies a persisted ChromaDB directory at the file level.
+    chroma.sqlite3 is copied with sqlite's online backup API, which gives a
+        consistent copy even while a client holds the source open, and the
+        segment folders (HNSW index files) are copied as plain files.
+    Memory note JSON files stored next to the database are skipped.
+    """
+    src_db = src / "chroma.sqlite3"
+    if not src_db.exists():
+        raise FileNotFoundError(f"No chroma.sqlite3 in {src}")
+    dest.mkdir(parents=True, exist_ok=True)
+    with closing(sqlite3.connect(str(src_db))) as src_conn, \
+            closing(sqlite3.connect(str(dest / "chroma.sqlite3"))) as dest_conn:
+        src_conn.backup(dest_conn)
+    for entry in src.iterdir():
+        if entry.is_dir():
+            shutil.copytree(
+                entry, dest / entry.name,
+                ignore=shutil.ignore_patterns("*.json"))
+
+
 class ChromaRetriever:
     """Vector database retrieval using ChromaDB"""
 
     def __init__(
         self, 
         collection_name: str = "memories", 
-        model_name: str = "all-MiniLM-L6-v2"
+        model_name: str = "all-MiniLM-L6-v2",
+        embedding_cache: Optional[EmbeddingCache] = None,
+        embedding_backend: Optional[str] = None
     ):
         """Initialize ChromaDB retriever.
 
         Args:
             collection_name: Name of the ChromaDB collection
+            embedding_cache: Optional cache consulted before the embedding model
+            embedding_backend: 'sentence_transformers' or 'onnx', None for
+                the process default
         """
         self.client = chromadb.Client(Settings(allow_reset=True))
-        self.embedding_function = SentenceTransformerEmbeddingFunction(
-            model_name=model_name
-        )
+        self.embedding_cache = embedding_cache
+        # shared and loaded on first use; documents are always added and
+        # queried with explicit embeddings, so the collection needs no
+        # embedding function of its own
+        self.embedding_function = get_embedding_function(
+            model_name, embedding_backend)
         self.collection = self.client.get_or_create_collection(
-            name=collection_name, embedding_function=self.embedding_function
+            name=collection_name
         )
 
+    def _process_metadata(self, metadata: Dict) -> Dict:
+        """Convert metadata values to types ChromaDB can store."""
+        processed_metadata = {}
+        for key, value in metadata.items():
+            if isinstance(value, list):
+                processed_metadata[key] = json.dumps(value)
+            elif isinstance(value, dict):
+                processed_metadata[key] = json.dumps(value)
+            else:
+                processed_metadata[key] = str(value)
+        return processed_metadata
+
+    def _embed(self, texts: List[str]):
+        """Embed a list of texts with one call to the embedding model.
+
+        Texts found in the embedding cache are not sent to the model.
+        """
+        if self.embedding_cache is not None:
+            return self.embedding_cache.embed(texts, self.embedding_function)
+        return self.embedding_function(texts)
+
     def add_document(self, document: str, metadata: Dict, doc_id: str):
         """Add a document to ChromaDB.
 
@@ -71,19 +130,60 @@ class ChromaRetriever:
             doc_id: Unique identifier for the document
         """
         # Convert MemoryNote object to serializable format
-        processed_metadata = {}
-        for key, value in metadata.items():
-            if isinstance(value, list):
-                processed_metadata[key] = json.dumps(value)
-            elif isinstance(value, dict):
-                processed_metadata[key] = json.dumps(value)
-            else:
-                processed_metadata[key] = str(value)
+        processed_metadata = self._process_metadata(metadata)
 
         self.collection.add(
-            documents=[document], metadatas=[processed_metadata], ids=[doc_id]
+            documents=[document], metadatas=[processed_metadata], ids=[doc_id],
+            embeddings=self._embed([document])
         )
 
+    def add_documents(
+        self,
+        documents: List[str],
+        metadatas: List[Dict],
+        doc_ids: List[str],
+        batch_size: int = 64
+    ) -> Dict:
+        """Add many documents to ChromaDB.
+
+        Documents are embedded `batch_size` at a time and written with a
+        single collection.add (split only if it exceeds the client's max
+        batch size).
+
+        Args:
+            documents: Text contents to add
+            metadatas: Metadata dictionary of each document
+            doc_ids: Unique identifier of each document
+            batch_size: Number of documents per embedding call
+
+        Returns:
+            Dict with the number of documents and the embedding and write time
+        """
+        start_time = datetime.now()
+        embeddings = []
+        for i in range(0, len(documents), batch_size):
+            embeddings.extend(self._embed(documents[i:i + batch_size]))
+        embed_time = (datetime.now() - start_time).total_seconds()
+
+        processed_metadatas = [self._process_metadata(m) for m in metadatas]
+        try:
+            max_batch_size = self.client.get_max_batch_size()
+        except Exception:
+            max_batch_size = len(documents) or 1
+        for i in range(0, len(documents), max_batch_size):
+            self.collection.add(
+                ids=doc_ids[i:i + max_batch_size],
+                documents=documents[i:i + max_batch_size],
+                metadatas=processed_metadatas[i:i + max_batch_size],
+                embeddings=embeddings[i:i + max_batch_size],
+            )
+        total_time = (datetime.now() - start_time).total_seconds()
+        return {
+            "count": len(documents),
+            "embed_seconds": embed_time,
+            "write_seconds": total_time - embed_time,
+        }
+
     def delete_document(self, doc_id: str):
         """Delete a document from ChromaDB.
 
@@ -92,6 +192,15 @@ class ChromaRetriever:
         """
         self.collection.delete(ids=[doc_id])
 
+    def delete_documents(self, doc_ids: List[str]):
+        """Delete several documents from ChromaDB in one call.
+
+        Args:
+            doc_ids: IDs of documents to delete
+        """
+        if doc_ids:
+            self.collection.delete(ids=list(doc_ids))
+
     def search(self, query: str, k: int = 5):
         """Search for similar documents.
 
@@ -102,7 +211,8 @@ class ChromaRetriever:
         Returns:
             Dict with documents, metadatas, ids, and distances
         """
-        results = self.collection.query(query_texts=[query], n_results=k)
+        results = self.collection.query(
+            query_embeddings=self._embed([query]), n_results=k)
         
         if (results is not None) and (results.get("metadatas", [])):
             results["metadatas"] = self._convert_metadata_types(
@@ -110,6 +220,66 @@ class ChromaRetriever:
         
         return results
 
+    def search_batch(
+        self,
+        queries: List[str],
+        ks: Union[int, List[int]] = 5,
+        filters: Optional[List[Optional[Dict]]] = None
+    ) -> List[Dict]:
+        """Search for several queries at once.
+
+        All queries are embedded in one call. Queries sharing the same filter
+        are sent as a single collection.query with `query_embeddings`, using
+        the largest k of the group, and cut back to their own k afterwards.
+
+        Args:
+            queries: Query texts
+            ks: Number of results per query, or one k for all queries
+            filters: Optional `where` filter per query (None for no filter)
+
+        Returns:
+            List aligned with `queries`, each a dict with flat lists of ids,
+            documents, metadatas and distances
+        """
+        if isinstance(ks, int):
+            ks = [ks] * len(queries)
+        if filters is None:
+            filters = [None] * len(queries)
+        if not (len(queries) == len(ks) == len(filters)):
+            raise ValueError("queries, ks and filters must have the same length")
+        results = [
+            {"ids": [], "documents": [], "metadatas": [], "distances": []}
+            for _ in queries
+        ]
+        if not queries:
+            return results
+
+        embeddings = self._embed(list(queries))
+        groups = {}
+        for i, where in enumerate(filters):
+            key = json.dumps(where, sort_keys=True)
+            groups.setdefault(key, []).append(i)
+
+        for indices in groups.values():
+            where = filters[indices[0]]
+            n_results = max(ks[i] for i in indices)
+            if n_results <= 0:
+                continue
+            group_results = self.collection.query(
+                query_embeddings=[embeddings[i] for i in indices],
+                n_results=n_results,
+                where=where,
+            )
+            if group_results.get("metadatas"):
+                group_results["metadatas"] = self._convert_metadata_types(
+                    group_results["metadatas"])
+            for j, i in enumerate(indices):
+                for field in results[i]:
+                    values = group_results.get(field) or []
+                    if j < len(values) and values[j] is not None:
+                        results[i][field] = list(values[j][:ks[i]])
+        return results
+
     def _convert_metadata_types(
         self, 
         metadatas: List[List[Dict]]
@@ -159,7 +329,9 @@ class PersistentChromaRetriever(ChromaRetriever):
         directory: Optional[str] = None, 
         collection_name: str = "memories", 
         model_name: str = "all-MiniLM-L6-v2",
-        extend: bool = False
+        extend: bool = False,
+        embedding_cache: Optional[EmbeddingCache] = None,
+        embedding_backend: Optional[str] = None
     ):
         """
         Initialize persistent ChromaDB retriever.
@@ -172,6 +344,9 @@ class PersistentChromaRetriever(ChromaRetriever):
             collection if it exists. Raises error if False and collection
             already exists. This prevents accidental overwriting of
             existing collections.
+        :embedding_cache: Optional cache consulted before the embedding model.
+        :embedding_backend: 'sentence_transformers' or 'onnx', None for the
+            process default.
         """
         if directory is None:
             directory = Path.home() / '.chromadb'
@@ -193,8 +368,9 @@ class PersistentChromaRetriever(ChromaRetriever):
 
         # Use PersistentClient instead of regular Client
         self.client = chromadb.PersistentClient(path=str(directory))
-        self.embedding_function = SentenceTransformerEmbeddingFunction(
-            model_name=model_name)
+        self.embedding_function = get_embedding_function(
+            model_name, embedding_backend)
+        self.embedding_cache = embedding_cache
         
         existing_collections = [col.name for col in self.client.list_collections()]
         
@@ -208,32 +384,46 @@ class PersistentChromaRetriever(ChromaRetriever):
                 )
         else:
             self.collection = self.client.get_or_create_collection(
-                name=collection_name,
-                embedding_function=self.embedding_function
+                name=collection_name
             )
         self.collection_name = collection_name
 
         record_count = self.collection.count()
         print(f"chormaDB中有 {record_count} 条记录")
 
-    def search_bycatogory(self, query: str, catogory:str, k: int = 5):
-        """Search for similar documents.
+    def search_bycatogory(self, query: str, catogory: Union[str, List[str]], k: int = 5):
+        """Search for similar documents within one or more categories.
+
+        The category filter is applied by ChromaDB during the nearest
+        neighbour search, so all returned documents belong to `catogory`.
 
         Args:
             query: Query text
+            catogory: Category, or list of categories, to search in
             k: Number of results to return
 
         Returns:
             Dict with documents, metadatas, ids, and distances
         """
-        where ={"catogory": catogory}
-        results = self.collection.query(query_texts=[query], n_results=k)
+        results = self.collection.query(
+            query_embeddings=self._embed([query]), n_results=k,
+            where=self._category_filter(catogory))
         
         if (results is not None) and (results.get("metadatas", [])):
             results["metadatas"] = self._convert_metadata_types(
                 results["metadatas"])
         
         return results
+
+    @staticmethod
+    def _category_filter(catogory: Union[str, List[str]]) -> Dict:
+        """Build the `where` filter matching one or several categories."""
+        if isinstance(catogory, str):
+            return {"category": catogory}
+        catogory = list(catogory)
+        if len(catogory) == 1:
+            return {"category": catogory[0]}
+        return {"category": {"$in": catogory}}
         
 
 
@@ -242,6 +432,9 @@ class CopiedChromaRetriever(PersistentChromaRetriever):
     ChromaDB retriever that creates a copy of an existing collection
         under to a temporary ChromaDB instance.
     Useful for creating isolated copies of shared starting memory collections.
+    The copy is a file-level snapshot of the source directory, so its cost
+        does not depend on the number of rows; copying the collection row by
+        row is only used if the snapshot fails.
     """
 
     def __init__(
@@ -251,6 +444,8 @@ class CopiedChromaRetriever(PersistentChromaRetriever):
         model_name: str = "all-MiniLM-L6-v2",
         _dest_collection_name: Optional[str] = None,
         _copy_batch_size: int = 10,
+        embedding_cache: Optional[EmbeddingCache] = None,
+        embedding_backend: Optional[str] = None,
     ):
         """
         Initialize the CopiedChromaDB retriever.
@@ -264,12 +459,18 @@ class CopiedChromaRetriever(PersistentChromaRetriever):
             This parameter is marked as private as the class itself is meant
             for single use and discard db that exists in a temporary so naming
             the copied collection is most likely not needed. 
-        :param _copy_batch_size: Number of documents to copy per batch.
-            Shouldn't need to be changed normally. 
+        :param _copy_batch_size: Number of documents to copy per batch when
+            falling back to a row by row copy. Shouldn't need to be changed
+            normally. 
+        :param embedding_cache: Optional cache consulted before the embedding
+            model.
+        :param embedding_backend: 'sentence_transformers' or 'onnx', None for
+            the process default.
         """
 
-        self.embedding_function = SentenceTransformerEmbeddingFunction(
-            model_name=model_name)
+        self.embedding_function = get_embedding_function(
+            model_name, embedding_backend)
+        self.embedding_cache = embedding_cache
 
         # ensure source is valid
         if directory is None:
@@ -287,7 +488,39 @@ class CopiedChromaRetriever(PersistentChromaRetriever):
                 f"Collection '{collection_name}' to be copied does not exist."
             )        
 
+        self.collection_name = (
+            _dest_collection_name 
+            or f"{collection_name}__clone"
+        )
+
         # use temp directory for destination collection
+        try:
+            self._snapshot(directory, collection_name)
+        except Exception as e:
+            print(f"Snapshot of {directory} failed ({e}), copying the collection row by row")
+            try:
+                self._tmpdir.cleanup()
+            except Exception:
+                pass
+            self._copy_rows(_copy_batch_size)
+        
+        atexit.register(self.close)
+
+    def _snapshot(self, directory: Path, collection_name: str):
+        """Open a file-level snapshot of `directory` in a temporary folder."""
+        self._tmpdir = tempfile.TemporaryDirectory(
+            prefix='chromadb_ephemeral_')
+        self._tmp_path = Path(self._tmpdir.name)
+        _snapshot_chroma_directory(directory, self._tmp_path)
+        self._dst_client = chromadb.PersistentClient(
+            path=str(self._tmp_path)
+        )
+        self.collection = self._dst_client.get_collection(name=collection_name)
+        if self.collection_name != collection_name:
+            self.collection.modify(name=self.collection_name)
+
+    def _copy_rows(self, batch_size: int):
+        """Copy the source collection into a new temporary ChromaDB."""
         try:
             self._tmpdir = tempfile.TemporaryDirectory(
                 prefix='chromadb_ephemeral_')
@@ -295,13 +528,8 @@ class CopiedChromaRetriever(PersistentChromaRetriever):
             self._dst_client = chromadb.PersistentClient(
                 path=str(self._tmp_path)
             )
-            self.collection_name = (
-                _dest_collection_name 
-                or f"{collection_name}__clone"
-            )
             self.collection = self._dst_client.get_or_create_collection(
                 name=self.collection_name,
-                embedding_function=self.embedding_function,
                 metadata=self._src.metadata
             )
         except Exception as e:
@@ -311,12 +539,10 @@ class CopiedChromaRetriever(PersistentChromaRetriever):
             _clone_collection(
                 src=self._src,
                 dest=self.collection,
-                batch_size=_copy_batch_size,
+                batch_size=batch_size,
             )
         except Exception as e:
             raise ValueError(f"Error cloning ChromaDB collection: {e}")
-        
-        atexit.register(self.close)
 
     def close(self):
         """Cleanup temporary directory."""
@@ -0,0 +1,94 @@
+"""Compact store for the small mutable fields of memory notes.
+
+The score of a note changes every time a similar note is added, while its
+JSON file mostly holds text that never changes. Those small fields are kept
+in a sqlite table next to the note files instead: updates are buffered in
+memory and written in batches, and the values in the table take precedence
+over the ones in the JSON files when the memory is loaded.
+"""
+import json
+import sqlite3
+import threading
+from typing import Dict
+
+
+class MemoryScoreStore:
+    """Buffered sqlite table of per-note fields (score, ...)."""
+
+    def __init__(self, path: str, flush_every: int = 32):
+        """Open (or create) the store.
+
+        Args:
+            path: sqlite file path
+            flush_every: number of buffered notes that triggers a write
+        """
+        self.path = path
+        self.flush_every = flush_every
+        self.lock = threading.Lock()
+        # id -> fields waiting to be written, None marks a deletion
+        self._pending = {}
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('CREATE TABLE IF NOT EXISTS note_fields (id TEXT PRIMARY KEY, fields TEXT)')
+        self.conn.commit()
+
+    def load(self) -> Dict[str, Dict]:
+        """All stored fields, by note id, including updates not flushed yet."""
+        with self.lock:
+            stored = {note_id: json.loads(fields)
+                      for note_id, fields in self.conn.execute('SELECT id, fields FROM note_fields')}
+            for note_id, fields in self._pending.items():
+                if fields is None:
+                    stored.pop(note_id, None)
+                else:
+                    stored.setdefault(note_id, {}).update(fields)
+            return stored
+
+    def update(self, note_id: str, **fields):
+        """Set fields of a note. Written at the next flush."""
+        with self.lock:
+            pending = self._pending.get(note_id)
+            if pending is None:
+                pending = self._pending[note_id] = {}
+            pending.update(fields)
+            if len(self._pending) >= self.flush_every:
+                self._flush()
+
+    def delete(self, note_id: str):
+        with self.lock:
+            self._pending[note_id] = None
+            if len(self._pending) >= self.flush_every:
+                self._flush()
+
+    def flush(self):
+        with self.lock:
+            self._flush()
+
+    def _flush(self):
+        """Write buffered updates in one transaction. Caller holds the lock."""
+        if not self._pending:
+            return
+        deleted = [(note_id,) for note_id, fields in self._pending.items() if fields is None]
+        updated = {note_id: fields for note_id, fields in self._pending.items() if fields is not None}
+        if updated:
+            placeholders = ','.join('?' * len(updated))
+            existing = {note_id: json.loads(fields) for note_id, fields in self.conn.execute(
+                f'SELECT id, fields FROM note_fields WHERE id IN ({placeholders})', list(updated))}
+            rows = []
+            for note_id, fields in updated.items():
+                merged = existing.get(note_id, {})
+                merged.update(fields)
+                rows.append((note_id, json.dumps(merged)))
+            self.conn.executemany('INSERT OR REPLACE INTO note_fields (id, fields) VALUES (?, ?)', rows)
+        if deleted:
+            self.conn.executemany('DELETE FROM note_fields WHERE id = ?', deleted)
+        self.conn.commit()
+        self._pending = {}
+
+    def close(self):
+        with self.lock:
+            if self.conn is None:
+                return
+            self._flush()
+            self.conn.close()
+            self.conn = None
@@ -72,7 +72,7 @@ class CodeReviewer(BaseAgent):
     def forward(self, problem, comment_pool):
         self.problem = problem
         comments_text = comment_pool.get_current_comment_text()
-        output = self.forward_chain.predict(
+        output = self.predict(
             problem_description=problem['description'], 
             code_example = problem['code_example'],
             comments_text=comments_text
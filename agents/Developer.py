@@ -1,13 +1,19 @@
 from agents.base_agent import BaseAgent
+from agents.prompt_budget import fit_examples, count_tokens
 
 from langchain import PromptTemplate, OpenAI, LLMChain
 from langchain.chat_models import ChatOpenAI
 
 from typing import List, Dict, Optional, Any, Tuple
 
-def generate_example_str(example_problem_list:List,example_code_list:List):
+def generate_example_str(example_problem_list:List,example_code_list:List,token_budget:Optional[int]=None):
     example_num = len(example_problem_list)
     example_str = 'To guide your work, study the following examples carefully. Each example demonstrates the complete thought process from problem description to structured extraction:\n'
+    # 按token预算截断示例，过长的代码省略中间部分
+    fitted = fit_examples([[('text', example_problem_list[i]), ('code', example_code_list[i])]
+                           for i in range(example_num)], token_budget)
+    example_problem_list = [problem for problem, _ in fitted]
+    example_code_list = [code for _, code in fitted]
     for i in range(example_num):
         example_str += '---\n'
         example_str += f'### EXAMPLE {i+1} ###\n'
@@ -74,43 +80,19 @@ class Developer(BaseAgent):
     def forward(self, problem, comment_pool):
         self.problem = problem
         comments_text = comment_pool.get_current_comment_text()
-        print('Input')
+        prompt_kwargs = dict(
+            problem_description=problem['description'], 
+            code_example=problem['code_example'],
+            comments_text=comments_text,
+        )
         if len(self.example_problem_list)!=0:
-            print(self.forward_prompt_template.format(
-                example_str=generate_example_str(self.example_problem_list,self.example_code_list),
-                problem_description=problem['description'], 
-                code_example=problem['code_example'],
-                comments_text=comments_text,
-            ))
-        else:
-            print(self.forward_prompt_template.format(
-                problem_description=problem['description'], 
-                code_example=problem['code_example'],
-                comments_text=comments_text,
-            ))
-        # print(self.forward_prompt_template.format(
-        #         problem_description=problem['description'], 
-        #         code_example=problem['code_example'],
-        #         comments_text=comments_text,
-        #     ))
+            prompt_kwargs['example_str'] = generate_example_str(self.example_problem_list,self.example_code_list)
+        prompt = self.forward_prompt_template.format(**prompt_kwargs)
+        self.last_prompt_tokens = count_tokens(prompt)
+        print('Input')
+        print(prompt)
+        print(f'Prompt tokens: {self.last_prompt_tokens}')
         print()
-        if len(self.example_problem_list)!=0:
-            output = self.forward_chain.predict(
-                example_str=generate_example_str(self.example_problem_list,self.example_code_list),
-                problem_description=problem['description'], 
-                code_example=problem['code_example'],
-                comments_text=comments_text,
-                )
-        else:
-            output = self.forward_chain.predict(
-                problem_description=problem['description'], 
-                code_example=problem['code_example'],
-                comments_text=comments_text,
-                )
-        # output = self.forward_chain.predict(
-        #         problem_description=problem['description'], 
-        #         code_example=problem['code_example'],
-        #         comments_text=comments_text,
-        #         )
+        output = self.predict(**prompt_kwargs)
         self.previous_code = output
         return output
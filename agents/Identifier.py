@@ -1,4 +1,5 @@
 from agents.base_agent import BaseAgent
+from agents.prompt_budget import fit_examples, count_tokens
 
 from langchain import PromptTemplate, OpenAI, LLMChain
 from langchain.chat_models import ChatOpenAI
@@ -7,11 +8,14 @@ from typing import List, Dict, Optional, Any, Tuple
 
 
 
-def generate_example_str(example_problem_list:List,example_output_list:List)->str:  
+def generate_example_str(example_problem_list:List,example_output_list:List,token_budget:Optional[int]=None)->str:  
     example_num = len(example_problem_list)
     example_str = 'To guide your work, study the following examples carefully. Each example demonstrates the complete thought process from problem description to structured extraction:\n'
-    example_output_list=example_output_list.copy()
-    example_problem_list=example_problem_list.copy()
+    # 按token预算截断示例，默认预算见 agents/prompt_budget.py
+    fitted = fit_examples([[('text', example_problem_list[i]), ('text', example_output_list[i])]
+                           for i in range(example_num)], token_budget)
+    example_problem_list = [problem for problem, _ in fitted]
+    example_output_list = [output for _, output in fitted]
     for i in range(example_num):
         #example_problem_list[i].replace('{', '{{').replace('}', '}}')
         #example_output_list[i].replace('{', '{{').replace('}', '}}')
@@ -152,43 +156,22 @@ class Identifier(BaseAgent):
 
        
             #self.forward_prompt_template = self.ROLE_DESCRIPTION + '\n' + self.FORWARD_TASK
-        print('Input')
+        prompt_kwargs = dict(
+            problem_description=problem['description'], 
+            comments_text=comments_text,
+        )
         if len(self.example_problem_list)!=0:
-            print(self.forward_prompt_template.format(
-                example_str=generate_example_str(self.example_problem_list,self.example_output_list),
-                problem_description=problem['description'], 
-                comments_text=comments_text,
-            ))
+            prompt_kwargs['example_str'] = generate_example_str(self.example_problem_list,self.example_output_list)
         elif len(self.example_summary_list)!=0:
-            print(self.forward_prompt_template.format(
-                example_str=generate_summary_str(self.example_summary_list),
-                problem_description=problem['description'], 
-                comments_text=comments_text,
-            ))
-        else:
-            print(self.forward_prompt_template.format(
-                problem_description=problem['description'], 
-                comments_text=comments_text,
-            ))
+            prompt_kwargs['example_str'] = generate_summary_str(self.example_summary_list)
+        prompt = self.forward_prompt_template.format(**prompt_kwargs)
+        self.last_prompt_tokens = count_tokens(prompt)
+        print('Input')
+        print(prompt)
+        print(f'Prompt tokens: {self.last_prompt_tokens}')
         print()
         
-        if len(self.example_problem_list)!=0:
-            output = self.forward_chain.predict(
-                example_str=generate_example_str(self.example_problem_list,self.example_output_list),
-                problem_description=problem['description'], 
-                comments_text=comments_text,
-                )
-        elif len(self.example_summary_list)!=0:
-            output = self.forward_chain.predict(
-                example_str=generate_summary_str(self.example_summary_list),
-                problem_description=problem['description'], 
-                comments_text=comments_text,
-                )
-        else:
-            output = self.forward_chain.predict(
-                problem_description=problem['description'], 
-                comments_text=comments_text,
-                )
+        output = self.predict(**prompt_kwargs)
        
         self.previous_answer = output
         return output
@@ -86,7 +86,7 @@ Your output format should be a JSON like this (choose at most 3 hardest terminol
             comments_text=comments_text
         ))
         print()
-        output = self.forward_chain.predict(
+        output = self.predict(
             problem_description=problem['description'], 
             comments_text=comments_text
         )
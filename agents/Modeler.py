@@ -40,7 +40,7 @@ Your output format should be a JSON like this:
             comments_text=comments_text
         ))
         print()
-        output = self.forward_chain.predict(
+        output = self.predict(
             problem_description=problem['description'], 
             comments_text=comments_text
         )
@@ -75,7 +75,7 @@ Minimalist Format: Do not include any redundant explanations. Output the concise
     def forward(self, problem, identify_text):
         self.problem = problem
         #comments_text = comment_pool.get_current_comment_text()
-        output = self.forward_chain.predict(
+        output = self.predict(
             problem_description=problem['description'], 
             identify_text = identify_text 
         )
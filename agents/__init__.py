@@ -1,6 +1,17 @@
-from agents.Modeler import Modeler
-from agents.Developer import Developer
-from agents.Interpreter import Interpreter
-from agents.CodeReviewer import CodeReviewer
-from agents.Identifier import Identifier
-from agents.Summarizer import Summarizer
+"""Agents of the Chain-of-Experts solver.
+
+The agent classes are imported on first access, so importing a helper module
+such as agents.llm_call or agents.llm_cache does not load langchain.
+"""
+import importlib
+
+__all__ = ['Modeler', 'Developer', 'Interpreter', 'CodeReviewer', 'Identifier', 'Summarizer']
+
+
+def __getattr__(name):
+    if name in __all__:
+        # each agent lives in a submodule of the same name
+        value = getattr(importlib.import_module(f'agents.{name}'), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module 'agents' has no attribute {name!r}")
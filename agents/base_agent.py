@@ -1,8 +1,9 @@
 from langchain import PromptTemplate, OpenAI, LLMChain
 from langchain.chat_models import ChatOpenAI
+from agents.llm_call import ChainPredictMixin
 
 
-class BaseAgent(object):
+class BaseAgent(ChainPredictMixin):
 
     def __init__(self, name, description, model):
         self.name = name
@@ -0,0 +1,117 @@
+"""Persistent LLM response cache.
+
+Responses are stored in a sqlite file and keyed by a sha256 hash of the model
+name, the rendered prompt and the sampling parameters. All agents run at
+temperature 0, so re-running a sweep on the same problems replays the stored
+responses instead of calling the endpoint again. The cache is bounded by
+entry count and total response size and evicts the least recently used rows.
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+
+class LLMResponseCache(object):
+
+    def __init__(self, path, max_entries=200000, max_bytes=2 * 1024 ** 3):
+        """Open (or create) the cache file.
+
+        Args:
+            path: sqlite file path
+            max_entries: maximum number of cached responses
+            max_bytes: maximum total size of cached responses in bytes
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS responses ('
+            'key TEXT PRIMARY KEY, model TEXT, response TEXT, size INTEGER, '
+            'created REAL, last_access REAL)'
+        )
+        self.conn.execute('CREATE INDEX IF NOT EXISTS responses_last_access ON responses(last_access)')
+        self.conn.commit()
+        self.num_entries, self.total_bytes = self.conn.execute(
+            'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses').fetchone()
+
+    @staticmethod
+    def make_key(model, prompt, params):
+        payload = json.dumps({'model': model, 'prompt': prompt, 'params': params},
+                             sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        with self.lock:
+            row = self.conn.execute('SELECT response FROM responses WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.conn.execute('UPDATE responses SET last_access = ? WHERE key = ?', (time.time(), key))
+            self.conn.commit()
+            return row[0]
+
+    def put(self, key, model, response):
+        size = len(response.encode('utf-8'))
+        now = time.time()
+        with self.lock:
+            old = self.conn.execute('SELECT size FROM responses WHERE key = ?', (key,)).fetchone()
+            self.conn.execute(
+                'INSERT OR REPLACE INTO responses (key, model, response, size, created, last_access) '
+                'VALUES (?, ?, ?, ?, ?, ?)', (key, model, response, size, now, now))
+            if old is None:
+                self.num_entries += 1
+                self.total_bytes += size
+            else:
+                self.total_bytes += size - old[0]
+            self._evict()
+            self.conn.commit()
+
+    def _evict(self):
+        """Drop least recently used rows until both bounds hold. Caller holds the lock."""
+        while self.num_entries > self.max_entries or self.total_bytes > self.max_bytes:
+            batch = max(1, self.num_entries // 100)
+            rows = self.conn.execute(
+                'SELECT key, size FROM responses ORDER BY last_access ASC LIMIT ?', (batch,)).fetchall()
+            if not rows:
+                break
+            self.conn.executemany('DELETE FROM responses WHERE key = ?', [(k,) for k, _ in rows])
+            self.num_entries -= len(rows)
+            self.total_bytes -= sum(size for _, size in rows)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'entries': self.num_entries,
+            'bytes': self.total_bytes,
+        }
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+_cache = None
+
+
+def configure_llm_cache(path=None, **kwargs):
+    """Enable the process-wide cache at `path`, or disable it when path is None."""
+    global _cache
+    if _cache is not None:
+        _cache.close()
+    _cache = LLMResponseCache(path, **kwargs) if path else None
+    return _cache
+
+
+def get_llm_cache():
+    return _cache
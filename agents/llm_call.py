@@ -0,0 +1,218 @@
+"""Shared call path for all LLM chains.
+
+Every agent goes through `predict_chain` (blocking) or `apredict_chain`
+(asyncio). Both take a slot from a per-endpoint limiter, which combines a
+token-bucket rate limit with a concurrency cap, and retry 429 and 5xx
+responses with jittered exponential backoff. Limiters are shared by all
+agents of the process, so many problems can be in flight at once without
+hard-coded sleeps between them. When a response cache is configured (see
+agents/llm_cache.py) it is consulted before any request is made.
+"""
+import asyncio
+import random
+import threading
+import time
+from contextlib import contextmanager, asynccontextmanager
+
+from agents.llm_cache import get_llm_cache
+
+
+# requests per second, bucket size, parallel requests per endpoint, retries
+LLM_LIMITS = {
+    'rate': 2.0,
+    'burst': 4,
+    'max_concurrency': 8,
+    'max_retries': 5,
+    'backoff_base': 1.0,
+    'backoff_cap': 60.0,
+}
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+class TokenBucket(object):
+
+    def __init__(self, rate, capacity):
+        """Token bucket shared by threads and event loops.
+
+        Args:
+            rate: tokens added per second
+            capacity: maximum number of stored tokens (burst size)
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _reserve(self):
+        """Take one token and return how long the caller must wait for it."""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+    def acquire(self):
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def aacquire(self):
+        wait = self._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+class EndpointLimiter(object):
+
+    def __init__(self, rate, burst, max_concurrency):
+        self.bucket = TokenBucket(rate, burst)
+        self.semaphore = threading.BoundedSemaphore(max_concurrency)
+
+    @contextmanager
+    def slot(self):
+        self.bucket.acquire()
+        self.semaphore.acquire()
+        try:
+            yield
+        finally:
+            self.semaphore.release()
+
+    @asynccontextmanager
+    async def aslot(self):
+        await self.bucket.aacquire()
+        # the semaphore is shared with threads, so poll instead of blocking the loop
+        while not self.semaphore.acquire(blocking=False):
+            await asyncio.sleep(0.05)
+        try:
+            yield
+        finally:
+            self.semaphore.release()
+
+
+def configure_llm_limits(**kwargs):
+    """Update LLM_LIMITS. Limiters created afterwards use the new values."""
+    for key, value in kwargs.items():
+        if key not in LLM_LIMITS:
+            raise KeyError(f'Unknown LLM limit: {key}')
+        if value is not None:
+            LLM_LIMITS[key] = value
+    with _limiters_lock:
+        _limiters.clear()
+
+
+def get_endpoint(llm):
+    return getattr(llm, 'openai_api_base', None) or 'default'
+
+
+def get_limiter(endpoint):
+    with _limiters_lock:
+        if endpoint not in _limiters:
+            _limiters[endpoint] = EndpointLimiter(
+                LLM_LIMITS['rate'], LLM_LIMITS['burst'], LLM_LIMITS['max_concurrency'])
+        return _limiters[endpoint]
+
+
+def is_retryable(e):
+    """429, 5xx, timeouts and dropped connections are worth retrying."""
+    status = getattr(e, 'status_code', None)
+    if status is None:
+        status = getattr(getattr(e, 'response', None), 'status_code', None)
+    if status is not None:
+        return status == 429 or status >= 500
+    return type(e).__name__ in ('APIConnectionError', 'APITimeoutError', 'Timeout', 'TimeoutError')
+
+
+def backoff_delay(attempt):
+    """Full-jitter exponential backoff."""
+    return random.uniform(0, min(LLM_LIMITS['backoff_cap'], LLM_LIMITS['backoff_base'] * 2 ** attempt))
+
+
+def cache_key(cache, chain, kwargs):
+    """Key of a chain call: model name, rendered prompt and sampling params."""
+    llm = chain.llm
+    params = {
+        'endpoint': get_endpoint(llm),
+        'temperature': getattr(llm, 'temperature', None),
+        'max_tokens': getattr(llm, 'max_tokens', None),
+        'model_kwargs': getattr(llm, 'model_kwargs', None),
+    }
+    prompt = chain.prompt.format(**kwargs)
+    return cache.make_key(getattr(llm, 'model_name', None), prompt, params)
+
+
+def predict_chain(chain, **kwargs):
+    """Blocking `chain.predict` with caching, rate limiting and retries."""
+    cache = get_llm_cache()
+    if cache is not None:
+        key = cache_key(cache, chain, kwargs)
+        output = cache.get(key)
+        if output is not None:
+            return output
+    output = _predict_with_retry(chain, kwargs)
+    if cache is not None:
+        cache.put(key, getattr(chain.llm, 'model_name', None), output)
+    return output
+
+
+async def apredict_chain(chain, **kwargs):
+    """Asyncio `chain.apredict` with caching, rate limiting and retries."""
+    cache = get_llm_cache()
+    if cache is not None:
+        key = cache_key(cache, chain, kwargs)
+        output = cache.get(key)
+        if output is not None:
+            return output
+    output = await _apredict_with_retry(chain, kwargs)
+    if cache is not None:
+        cache.put(key, getattr(chain.llm, 'model_name', None), output)
+    return output
+
+
+class ChainPredictMixin(object):
+    """predict/apredict for agents that keep their LLMChain in `self.forward_chain`."""
+
+    def predict(self, **kwargs):
+        """Run forward_chain through the shared rate limiter and retry policy."""
+        return predict_chain(self.forward_chain, **kwargs)
+
+    async def apredict(self, **kwargs):
+        """Asyncio version of predict, for running many agents concurrently."""
+        return await apredict_chain(self.forward_chain, **kwargs)
+
+
+def _predict_with_retry(chain, kwargs):
+    limiter = get_limiter(get_endpoint(chain.llm))
+    attempt = 0
+    while True:
+        try:
+            with limiter.slot():
+                return chain.predict(**kwargs)
+        except Exception as e:
+            if attempt >= LLM_LIMITS['max_retries'] or not is_retryable(e):
+                raise
+            delay = backoff_delay(attempt)
+            print(f'LLM call failed ({type(e).__name__}), retry {attempt + 1} in {delay:.1f}s')
+            time.sleep(delay)
+            attempt += 1
+
+
+async def _apredict_with_retry(chain, kwargs):
+    limiter = get_limiter(get_endpoint(chain.llm))
+    attempt = 0
+    while True:
+        try:
+            async with limiter.aslot():
+                return await chain.apredict(**kwargs)
+        except Exception as e:
+            if attempt >= LLM_LIMITS['max_retries'] or not is_retryable(e):
+                raise
+            delay = backoff_delay(attempt)
+            print(f'LLM call failed ({type(e).__name__}), retry {attempt + 1} in {delay:.1f}s')
+            await asyncio.sleep(delay)
+            attempt += 1
@@ -0,0 +1,167 @@
+"""Token budget for the memory examples put into agent prompts.
+
+Retrieved memories are pasted into the Identifier and Developer prompts as
+examples. Without a limit the prompt grows with the number of memories and
+with the length of their analyses and code. `fit_examples` splits a token
+budget over the examples and their fields: short fields keep their full
+text and leave the rest of their share to the longer ones, long text is cut
+at the end and long code keeps its imports, signature and final lines with
+the middle elided.
+
+Tokens are counted with tiktoken's cl100k_base encoding; if tiktoken or its
+encoding file is not available, 4 characters are counted as one token.
+"""
+import threading
+from typing import List, Optional, Sequence, Tuple
+
+# tokens of all examples in one prompt, None for no limit
+PROMPT_BUDGET = {
+    'example_tokens': 6000,
+}
+
+_encoding = None
+_encoding_lock = threading.Lock()
+_encoding_failed = False
+
+
+def configure_prompt_budget(**kwargs):
+    """Update PROMPT_BUDGET, e.g. configure_prompt_budget(example_tokens=4000)."""
+    for key, value in kwargs.items():
+        if key not in PROMPT_BUDGET:
+            raise KeyError(f'Unknown prompt budget: {key}')
+        PROMPT_BUDGET[key] = value
+
+
+def _get_encoding():
+    global _encoding, _encoding_failed
+    if _encoding is None and not _encoding_failed:
+        with _encoding_lock:
+            if _encoding is None and not _encoding_failed:
+                try:
+                    import tiktoken
+                    _encoding = tiktoken.get_encoding('cl100k_base')
+                except Exception as e:
+                    print(f'tiktoken unavailable ({type(e).__name__}), estimating 4 characters per token')
+                    _encoding_failed = True
+    return _encoding
+
+
+def count_tokens(text: str) -> int:
+    encoding = _get_encoding()
+    if encoding is None:
+        return (len(text) + 3) // 4
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def truncate_text(text: str, max_tokens: int) -> str:
+    """Keep the beginning of `text` within `max_tokens`."""
+    if count_tokens(text) <= max_tokens:
+        return text
+    marker = '\n... [truncated]'
+    max_tokens = max(0, max_tokens - count_tokens(marker))
+    encoding = _get_encoding()
+    if encoding is None:
+        return text[:max_tokens * 4] + marker
+    return encoding.decode(encoding.encode(text, disallowed_special=())[:max_tokens]) + marker
+
+
+def _is_header_line(line: str) -> bool:
+    stripped = line.strip()
+    return stripped.startswith(('import ', 'from ', 'def ', 'class ', '@'))
+
+
+def elide_code(code: str, max_tokens: int) -> str:
+    """Shorten `code` to `max_tokens` by eliding lines from the middle.
+
+    Imports, def/class lines and decorators are kept, comments and blank
+    lines go first, then the body is cut down to its first and last lines.
+    """
+    if count_tokens(code) <= max_tokens:
+        return code
+    lines = [line for line in code.splitlines()
+             if line.strip() and not line.strip().startswith('#')]
+    if count_tokens('\n'.join(lines)) <= max_tokens:
+        return '\n'.join(lines)
+
+    headers = {i for i, line in enumerate(lines) if _is_header_line(line)}
+    body = [i for i in range(len(lines)) if i not in headers]
+
+    def build(num_kept):
+        # keep the first 2/3 and last 1/3 of num_kept body lines, plus every header line
+        head = (num_kept * 2 + 2) // 3
+        tail = num_kept - head
+        kept = headers | set(body[:head]) | set(body[len(body) - tail:] if tail else [])
+        out, elided = [], 0
+        for i, line in enumerate(lines):
+            if i in kept:
+                if elided:
+                    indent = line[:len(line) - len(line.lstrip())]
+                    out.append(f'{indent}# ... ({elided} lines elided) ...')
+                    elided = 0
+                out.append(line)
+            else:
+                elided += 1
+        if elided:
+            out.append(f'# ... ({elided} lines elided) ...')
+        return '\n'.join(out)
+
+    low, high = 0, len(body)
+    best = build(0)
+    while low <= high:
+        mid = (low + high) // 2
+        candidate = build(mid)
+        if count_tokens(candidate) <= max_tokens:
+            best, low = candidate, mid + 1
+        else:
+            high = mid - 1
+    if count_tokens(best) > max_tokens:
+        best = truncate_text(best, max_tokens)
+    return best
+
+
+def allocate_budget(sizes: Sequence[int], budget: int) -> List[int]:
+    """Split `budget` over items of the given sizes.
+
+    Every item gets an equal share; items needing less than their share keep
+    only what they need and the rest is shared by the others.
+    """
+    allocation = [0] * len(sizes)
+    remaining = sorted(range(len(sizes)), key=lambda i: sizes[i])
+    while remaining:
+        share = budget // len(remaining)
+        i = remaining[0]
+        if sizes[i] <= share:
+            allocation[i] = sizes[i]
+            budget -= sizes[i]
+            remaining.pop(0)
+        else:
+            for i in remaining:
+                allocation[i] = share
+            break
+    return allocation
+
+
+def fit_examples(examples: Sequence[Sequence[Tuple[str, str]]], budget: Optional[int] = None) -> List[List[str]]:
+    """Fit the fields of every example into a token budget.
+
+    Args:
+        examples: per example, a list of (kind, text) fields, where kind is
+            'code' for code and anything else for plain text
+        budget: total tokens of all fields, defaults to PROMPT_BUDGET['example_tokens']
+
+    Return:
+        texts: per example, the (possibly shortened) text of each field
+    """
+    budget = PROMPT_BUDGET['example_tokens'] if budget is None else budget
+    fields = [(i, kind, str(text)) for i, example in enumerate(examples) for kind, text in example]
+    texts = [[] for _ in examples]
+    if budget is None:
+        for i, _, text in fields:
+            texts[i].append(text)
+        return texts
+    sizes = [count_tokens(text) for _, _, text in fields]
+    for (i, kind, text), size, allowed in zip(fields, sizes, allocate_budget(sizes, budget)):
+        if size > allowed:
+            text = elide_code(text, allowed) if kind == 'code' else truncate_text(text, allowed)
+        texts[i].append(text)
+    return texts
@@ -62,11 +62,8 @@ def solve(problem_data, dataset, problem, model_name='deepseek-chat'):
         )
         answer = llm_chain.predict(problem_description=problem_description, code_example=code_example, code_answer=code_answer, code_comment=code_comment)
         code = extract_code_from_string(answer)
-        code_filenames = 'generated_code.py'
-        with open(code_filenames, 'w') as f:
-            f.write(code)
         test_sample = read_test_samples(dataset, problem)
-        result = test_generated_code(problem, test_sample, None)
+        result = test_generated_code(problem, code, test_sample, None)
 
         if result == Result.ACCEPT:
             print(f"Iteration {i+1}: Code executed successfully.")
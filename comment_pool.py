@@ -1,4 +1,7 @@
 from comment import Comment
+from agents.prompt_budget import count_tokens
+
+NO_COMMENT_TEXT = 'There is no comment available, please ignore this section.\n'
 
 
 class CommentPool(object):
@@ -6,6 +9,11 @@ class CommentPool(object):
     def __init__(self, all_agents, visible_matrix):
         """A global data structure store current comments.
 
+        Comments are only appended. Each comment is rendered once when it is
+        added, and the transcript of every viewer (and the full transcript)
+        is extended in place, so reading a transcript does not depend on the
+        number of comments.
+
         Args:
             agents: list of Baseagent
             visible_matrix: two-dimension numpy array
@@ -14,34 +22,67 @@ class CommentPool(object):
         self.all_agents = all_agents
         self.agent_name_to_id = { agent.name: i for i, agent in enumerate(all_agents) }
         self.visible_matrix = visible_matrix
+        # author name -> names of the agents that can see its comments
+        self._viewers_of = {
+            author.name: [viewer.name for viewer in all_agents if visible_matrix[self.agent_name_to_id[viewer.name]][j] == 1]
+            for j, author in enumerate(all_agents)
+        }
+        # per viewer: visible comments, rendered lines, cached text, token count
+        self._visible_comments = { agent.name: [] for agent in all_agents }
+        self._lines = { agent.name: [] for agent in all_agents }
+        self._texts = {}
+        self._tokens = { agent.name: 0 for agent in all_agents }
+        self._all_lines = []
+        self._all_text = None
+        self._all_tokens = 0
+
+    @staticmethod
+    def render(comment: Comment):
+        return comment.agent.name + ': ```' + comment.comment_text + '```\n'
 
     def add_comment(self, comment: Comment):
         self.comments.append(comment)
+        line = self.render(comment)
+        tokens = count_tokens(line)
+        self._all_lines.append(line)
+        self._all_text = None
+        self._all_tokens += tokens
+        # comments of agents outside the pool only appear in the full transcript
+        for viewer in self._viewers_of.get(comment.agent.name, []):
+            self._visible_comments[viewer].append(comment)
+            self._lines[viewer].append(line)
+            self._texts.pop(viewer, None)
+            self._tokens[viewer] += tokens
 
     def get_comments(self, agent_name):    #获取智能体评论
         """Get comments by agent's name
-        
+
         Args
             agent_name: str
         """
-        id_ = self.agent_name_to_id[agent_name]
-        visible_indices = self.visible_matrix[id_]
-
-        comment_list = []
-        for comment in self.comments:
-            target_id = self.agent_name_to_id[comment.agent.name]
-            if visible_indices[target_id] == 1:
-                comment_list.append(comment)
-        return comment_list
-    
+        return list(self._visible_comments[agent_name])
+
+    def get_comment_text(self, agent_name):
+        """Transcript of the comments visible to `agent_name`."""
+        if not self._lines[agent_name]:
+            return NO_COMMENT_TEXT
+        text = self._texts.get(agent_name)
+        if text is None:
+            text = self._texts[agent_name] = ''.join(self._lines[agent_name])
+        return text
+
+    def get_comment_tokens(self, agent_name=None):
+        """Token count of the transcript of `agent_name`, or of all comments if None."""
+        if agent_name is None:
+            return self._all_tokens
+        return self._tokens[agent_name]
+
     def get_current_comment_text(self):
-        comments_text = ''
         if len(self.comments) == 0:
-            comments_text = 'There is no comment available, please ignore this section.\n'
-        else:
-            for comment in self.comments:
-                comments_text += comment.agent.name + ': ```' + comment.comment_text + '```\n'
-        return comments_text
-    
+            return NO_COMMENT_TEXT
+        if self._all_text is None:
+            self._all_text = ''.join(self._all_lines)
+        return self._all_text
+
     def __len__(self):
         return len(self.comments)
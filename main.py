@@ -2,7 +2,6 @@ import os
 import json
 import numpy as np
 from comment import Comment
-from Orchestrator import Orchestrator
 from reducer import Reducer
 from agents import (
     Modeler, 
@@ -10,25 +9,83 @@ from agents import (
     Identifier,
 )
 from comment_pool import CommentPool
+from routing import build_routing_policy
+from stop_criteria import check_stop, validate_stop_criteria
+from speculative import make_candidate_reducers, generate_first_passing
 from utils import extract_code_from_string
 import re
+import sandbox
 
 from agentic_memory_rb.memory_system_rb import MemoryNote
 from typing import Optional
 
+def function_name_of(problem):
+    """Name of the function the problem asks for, from its code example."""
+    match = re.search(r'def\s+(\w+)\s*\(', problem['code_example'])
+    return match.group(1) if match else None
+
+
+def dry_run_code(problem, comment_text, sample_inputs, pool=None, cancel_event=None):
+    """Run the code of a comment on the sample inputs in the sandbox.
+
+    Only the inputs are used: the code passes if it runs on every sample and
+    returns a value, the outputs are not compared with the expected ones.
+    Setting `cancel_event` abandons the run and kills its sandbox workers.
+
+    Return:
+        (code, reason): the extracted code, or None if it failed, and why
+    """
+    if '```' not in comment_text:
+        return None, 'no code block'
+    func_name = function_name_of(problem)
+    if func_name is None:
+        return None, 'function name not found in code example'
+    code = extract_code_from_string(comment_text).replace('inrange', 'in range')
+    pool = pool or sandbox.get_default_pool()
+    records = pool.run_samples(code, func_name, sample_inputs, cancel_event=cancel_event)
+    for record in records:
+        if record.status != sandbox.OK:
+            return None, f'sample {record.index}: {record.status}'
+        if record.output is None:
+            return None, f'sample {record.index}: returned None'
+    return code, f'{len(records)} samples ran'
+
+
 def chain_of_agents(problem, 
                      max_collaborate_nums, 
                      model_name,
                      mode,
-                     memory_notes:Optional[list[MemoryNote]]=None):
+                     memory_notes:Optional[list[MemoryNote]]=None,
+                     routing='llm',
+                     stop_criteria=(),
+                     run_stats:Optional[dict]=None,
+                     sample_inputs:Optional[list]=None,
+                     skip_reducer=False,
+                     num_candidates=1,
+                     comment_log_path='comment_log.txt'):
     """Run Chain of agents pipeline
     
     Args:
         problem: a dict of problem_description and code_example.
+        routing: name of the routing policy choosing the next agent, see routing.py
+        stop_criteria: names of the criteria ending the collaboration early, see stop_criteria.py
+        run_stats: if given, filled with the rounds run, the rounds skipped and the stop reason
+        sample_inputs: inputs of the problem's samples, used to dry-run code in the sandbox
+        skip_reducer: return the Developer's last code without calling the Reducer
+            when it runs on `sample_inputs`
+        num_candidates: number of Reducer answers generated concurrently; the first
+            that runs on `sample_inputs` is returned, see speculative.py
+        comment_log_path: file for the comments and routing decisions of this problem;
+            give each concurrently solved problem its own file
     
     Return:
         code: code of problem
     """
+    # 参数错误在协作开始前报出，不浪费任何一轮LLM调用
+    if (skip_reducer or num_candidates > 1) and sample_inputs is None:
+        raise ValueError('skip_reducer and num_candidates > 1 need sample_inputs')
+    validate_stop_criteria(stop_criteria)
+
     #print(memory_notes[0].problem_description if memory_notes else "No memory notes provided.")
     if mode==1:
         example_problem_list = [note.problem_description for note in memory_notes] if memory_notes else []
@@ -56,15 +113,25 @@ def chain_of_agents(problem,
     reducer = Reducer(model_name)
     #summarizer = Summarizer(model_name)
     comment_pool = CommentPool(all_agents, visible_matrix=np.ones((num_agents, num_agents))) #可见矩阵全1即所有专家都可见其他评论
-    orchestrator = Orchestrator(model_name)
+    router = build_routing_policy(routing, model_name)
 
-    comment_log = open('comment_log.txt', 'w',encoding='utf-8',errors='ignore')
+    comment_log = open(comment_log_path, 'w',encoding='utf-8',errors='ignore')
     comment_log_formemory = ''
+    comment_log_forcode = ''
 
+    rounds = 0
+    stop_reason = None
     for i in range(max_collaborate_nums):
-        next_agent = orchestrator.forward(problem, comment_pool, max_collaborate_nums)
-        print(f'Choose next agent: {next_agent.name}')
+        decision = router.route(problem, comment_pool, max_collaborate_nums)
         comment_log.write(f'--------- Round {i+1} ----------\n')
+        if decision.agent is None:
+            stop_reason = f'routing ({router.name}): {decision.reason}'
+            print(f'Routing ({router.name}): stop, {decision.reason}')
+            comment_log.write(f'Routing ({router.name}): stop, {decision.reason}\n\n')
+            break
+        next_agent = decision.agent
+        print(f'Choose next agent: {next_agent.name}')
+        comment_log.write(f'Routing ({router.name}): {next_agent.name}, {decision.reason}\n')
         comment_log.write(f'Agent {next_agent.name} comment:\n')
         #comment_log_formemory += f'Agent {next_agent.name} comment:\n'
         comment_text = next_agent.forward(problem, comment_pool)
@@ -75,16 +142,44 @@ def chain_of_agents(problem,
         if next_agent.name == 'Developer':
             comment_log_forcode = f'{comment_text}'
         comment_pool.add_comment(Comment(next_agent, comment_text))
-    answer = reducer.forward(problem, comment_pool)
+        rounds += 1
+        if rounds < max_collaborate_nums:
+            reason = check_stop(comment_pool, stop_criteria)
+            if reason is not None:
+                stop_reason = reason
+                break
+
+    skipped_rounds = max_collaborate_nums - rounds
+    if skipped_rounds > 0:
+        print(f'Collaboration stopped after {rounds} rounds, {skipped_rounds} skipped: {stop_reason}')
+        comment_log.write(f'Stopped after {rounds} rounds, {skipped_rounds} skipped: {stop_reason}\n')
+    if run_stats is not None:
+        run_stats.update(rounds=rounds, skipped_rounds=skipped_rounds, stop_reason=stop_reason, routing=router.name)
+
+    answer = None
+    if skip_reducer and comment_log_forcode:
+        code, reason = dry_run_code(problem, comment_log_forcode, sample_inputs)
+        print(f'Developer code dry run: {"passed" if code else "failed"}, {reason}')
+        comment_log.write(f'Developer code dry run: {"passed" if code else "failed"}, {reason}\n')
+        if code is not None:
+            answer = f'```python\n{code}\n```'
+        if run_stats is not None:
+            run_stats.update(reducer_skipped=code is not None, dry_run=reason)
+    if answer is None and num_candidates > 1:
+        reducers = make_candidate_reducers(model_name, num_candidates)
+        answer, winner, checked = generate_first_passing(
+            reducers, problem, comment_pool,
+            lambda candidate, cancel_event: dry_run_code(problem, candidate, sample_inputs, cancel_event=cancel_event))
+        print(f'Candidates: {checked}/{num_candidates} checked, winner: {winner}')
+        comment_log.write(f'Candidates: {checked}/{num_candidates} checked, winner: {winner}\n')
+        if run_stats is not None:
+            run_stats.update(num_candidates=num_candidates, candidates_checked=checked, winning_candidate=winner)
+    if answer is None:
+        answer = reducer.forward(problem, comment_pool)
     #summary = summarizer.forward(problem , comment_log_formemory)
     #total_comments = comment_pool.get_current_comment_text()
 
     comment_log.close()
-    code = extract_code_from_string(answer)
-    ### Fix common syntax errors
-    code = code.replace('inrange', 'in range')
-    with open('generated_code.py', 'w', encoding='utf8', errors='ignore') as f:
-        f.write(code)
     return answer,comment_log_formemory,comment_log_forcode
 
 
@@ -24,9 +24,16 @@ class Reducer(BaseAgent):
 
     def forward(self, problem_description, workspace):
         comment_text = workspace.get_current_comment_text()
-        answer = self.forward_chain.predict(
+        answer = self.predict(
             problem_description=problem_description, 
             comment_text=comment_text
         )
         return answer
 
+    async def aforward(self, problem_description, workspace):
+        comment_text = workspace.get_current_comment_text()
+        answer = await self.apredict(
+            problem_description=problem_description,
+            comment_text=comment_text
+        )
+        return answer
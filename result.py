@@ -7,3 +7,4 @@ class Result(Enum):
     WRONG_ANSWER = 1
     RUNTIME_ERROR = 2
     COMPILE_ERROR = 3
+    TIMEOUT = 4
@@ -0,0 +1,120 @@
+"""Routing policies: which agent comments next in chain_of_agents.
+
+    llm:      ask the Orchestrator (one LLM call per round, the original behaviour)
+    pipeline: every agent once, in the order of `all_agents`
+              (Identifier -> Modeler -> Developer), then stop
+    rule:     agents that have not commented yet in order; once everyone has
+              spoken, stop if the Developer's last comment contains code and
+              ask the Developer again otherwise
+
+A policy returns a RoutingDecision; a decision without an agent ends the
+collaboration before `max_collaborate_nums` rounds. The pipeline and rule
+policies make no LLM call.
+"""
+from collections import namedtuple
+
+from utils import extract_code_from_string
+
+RoutingDecision = namedtuple('RoutingDecision', ['agent', 'reason'])
+
+CODE_AGENT_NAME = 'Developer'
+
+
+def remaining_agents(comment_pool):
+    """Agents that have not commented yet, in the order of all_agents."""
+    commented = {c.agent.name for c in comment_pool.comments}
+    return [agent for agent in comment_pool.all_agents if agent.name not in commented]
+
+
+def has_code(comment_text):
+    """True if a comment contains a code block with a function definition."""
+    if '```' not in comment_text:
+        return False
+    return 'def ' in extract_code_from_string(comment_text)
+
+
+def last_comment_of(comment_pool, agent_name):
+    for comment in reversed(comment_pool.comments):
+        if comment.agent.name == agent_name:
+            return comment
+    return None
+
+
+class RoutingPolicy:
+    """Chooses the next agent of a collaboration round."""
+
+    name = 'base'
+
+    def __init__(self, stop_after_code=True):
+        """
+        Args:
+            stop_after_code: end the collaboration once the Developer has produced code
+        """
+        self.stop_after_code = stop_after_code
+
+    def route(self, problem, comment_pool, max_collaborate_nums) -> RoutingDecision:
+        raise NotImplementedError
+
+    def code_is_ready(self, comment_pool):
+        if not self.stop_after_code:
+            return False
+        comment = last_comment_of(comment_pool, CODE_AGENT_NAME)
+        return comment is not None and has_code(comment.comment_text)
+
+
+class LLMRoutingPolicy(RoutingPolicy):
+    name = 'llm'
+
+    def __init__(self, model_name, stop_after_code=False):
+        super().__init__(stop_after_code)
+        from Orchestrator import Orchestrator
+        self.orchestrator = Orchestrator(model_name)
+
+    def route(self, problem, comment_pool, max_collaborate_nums):
+        if self.code_is_ready(comment_pool) and not remaining_agents(comment_pool):
+            return RoutingDecision(None, 'all agents commented and Developer code is ready')
+        agent = self.orchestrator.forward(problem, comment_pool, max_collaborate_nums)
+        return RoutingDecision(agent, 'chosen by Orchestrator')
+
+
+class PipelineRoutingPolicy(RoutingPolicy):
+    name = 'pipeline'
+
+    def route(self, problem, comment_pool, max_collaborate_nums):
+        remaining = remaining_agents(comment_pool)
+        if self.code_is_ready(comment_pool):
+            return RoutingDecision(None, 'Developer code is ready')
+        if not remaining:
+            return RoutingDecision(None, 'pipeline finished')
+        return RoutingDecision(remaining[0], 'next in pipeline')
+
+
+class RuleRoutingPolicy(RoutingPolicy):
+    name = 'rule'
+
+    def route(self, problem, comment_pool, max_collaborate_nums):
+        remaining = remaining_agents(comment_pool)
+        if remaining:
+            return RoutingDecision(remaining[0], 'has not commented yet')
+        if self.code_is_ready(comment_pool):
+            return RoutingDecision(None, 'all agents commented and Developer code is ready')
+        developer = next((a for a in comment_pool.all_agents if a.name == CODE_AGENT_NAME), None)
+        if developer is None:
+            return RoutingDecision(None, 'all agents commented')
+        return RoutingDecision(developer, 'no code from Developer yet')
+
+
+ROUTING_POLICIES = {
+    'llm': LLMRoutingPolicy,
+    'pipeline': PipelineRoutingPolicy,
+    'rule': RuleRoutingPolicy,
+}
+
+
+def build_routing_policy(name='llm', model_name=None):
+    """Create a policy from its name, as used by the --routing flag."""
+    if name not in ROUTING_POLICIES:
+        raise ValueError(f'Unknown routing policy: {name}, expected one of {list(ROUTING_POLICIES)}')
+    if name == 'llm':
+        return LLMRoutingPolicy(model_name)
+    return ROUTING_POLICIES[name]()
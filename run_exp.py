@@ -1,43 +1,64 @@
-import argparse
 import time
+_start_time = time.perf_counter()
+import argparse
+import importlib
 import os
 import re
-from tqdm import tqdm
+import threading
+from contextlib import nullcontext
 from pathlib import Path
-from langchain.callbacks import get_openai_callback
 from test_generated_code import test_generated_code, read_test_samples
 from utils import extract_code_from_string, read_problem
 from result import Result
-import baseline.standard as standard
-import baseline.standard2 as standard2
-import baseline.chain_of_thought as cot
-import baseline.progressive_hint as php
-import baseline.reflexion as reflexion
-from main import chain_of_agents
-from Selector import Selector
-from Summarizer import Summarizer
+from agents.llm_call import configure_llm_limits
+from agents.llm_cache import configure_llm_cache
+from agents.prompt_budget import configure_prompt_budget
+from sandbox import configure_sandbox, get_default_pool
+from agentic_memory_rb.embedding_models import configure_embedding_backend
+from agentic_memory_rb.eviction import build_eviction_policy
+from stop_criteria import STOP_CRITERIA
 import random
 import sys
 
-# 加载记忆系统
-from agentic_memory_rb.memory_system_rb import AgenticMemorySystemRB
 proxy_url = 'http://127.0.0.1:7890'
 os.environ['HTTP_PROXY'] = proxy_url
 os.environ['HTTPS_PROXY'] = proxy_url
-from agentic_memory_rb.memory_system_rb import MemoryNote
 
+# Heavy subsystems (langchain, the memory stack with chromadb and nltk, the
+# agents) are imported on first use, so runs that do not need them start fast.
 algorithms = {
-    'standard': standard,
-    'standard2': standard2,
-    'chain_of_thought': cot,
-    'cot': cot,
-    'progressive_hint': php,
-    'php': php,
+    'standard': 'baseline.standard',
+    'standard2': 'baseline.standard2',
+    'chain_of_thought': 'baseline.chain_of_thought',
+    'cot': 'baseline.chain_of_thought',
+    'progressive_hint': 'baseline.progressive_hint',
+    'php': 'baseline.progressive_hint',
     # 'solo_performance_prompting': ssp,
     # 'ssp': ssp,
-    'reflexion': reflexion,
+    'reflexion': 'baseline.reflexion',
 }
 
+# seconds spent in each lazy import, reported by --profile-startup
+import_times = {'run_exp (eager imports)': time.perf_counter() - _start_time}
+
+
+def lazy_import(name):
+    """Import module `name` and record how long the first import took."""
+    if name in sys.modules:
+        return sys.modules[name]
+    start_time = time.perf_counter()
+    module = importlib.import_module(name)
+    import_times[name] = time.perf_counter() - start_time
+    return module
+
+
+def print_startup_profile():
+    print('-' * 10 + 'Startup profile' + '-' * 15)
+    for name, seconds in sorted(import_times.items(), key=lambda item: -item[1]):
+        print(f'{seconds:8.3f}s  {name}')
+    print(f'{time.perf_counter() - _start_time:8.3f}s  total since start')
+    print('-' * 40)
+
 # 强制将标准输出和标准错误的编码设置为 utf-8
 sys.stdout.reconfigure(encoding='utf-8')
 # 如果有用到 stderr 最好也加上
@@ -73,7 +94,7 @@ def extract_or_assign_classification(text):
     else:
         return random.choice(all_classes)
 
-def main():
+def parse_args(argv=None):
     parser = argparse.ArgumentParser(description='Generate and test code.')
     parser.add_argument('--dataset', type=str, default='mix_dataset', help='Dataset name, "LPWP" or "ComplexOR"')
     parser.add_argument('--problem', type=str, default='prob_.*', help='Problem name')
@@ -88,127 +109,215 @@ def main():
     parser.add_argument('--evolve',type=str, default='true', help='if the system will record and evolve memory')
     parser.add_argument('--forget',type=str, default='true', help='if the system will forget memory')
     parser.add_argument('--check',type=str, default='true', help='if the system will check memory')
+    parser.add_argument('--forget_policy',type=str, default='score', choices=['score', 'lru', 'lfu', 'decay', 'budget'], help='which memories are forgotten')
+    parser.add_argument('--forget_keep',type=int, default=5, help='memories kept per category by the score, lru, lfu and decay policies')
+    parser.add_argument('--memory_budget_tokens',type=int, default=None, help='token budget of all memories for the budget policy')
+    parser.add_argument('--skip_reducer',type=str, default='false', help='if the Developer code is used without the Reducer when it runs on the sample inputs')
+    parser.add_argument('--num_candidates',type=int, default=1, help='Number of final answers generated concurrently, the first that runs on the sample inputs is used')
+    parser.add_argument('--evolve_async',type=str, default='false', help='if abstruct memory evolves in the background')
+    parser.add_argument('--async_memory',type=str, default='false', help='if summarizing and memory updates run in the background')
 
     parser.add_argument('--max_collaborate_nums', type=int, default=5, help='Number of max collaborations')
-    args = parser.parse_args()
+    parser.add_argument('--routing', type=str, default='llm', choices=['llm', 'pipeline', 'rule'], help='How the next agent is chosen in each collaboration round')
+    parser.add_argument('--stop_criteria', type=str, nargs='*', default=[], choices=list(STOP_CRITERIA), help='Criteria ending the collaboration before max_collaborate_nums rounds')
+    parser.add_argument('--llm_rate', type=float, default=None, help='Max LLM requests per second per endpoint')
+    parser.add_argument('--llm_concurrency', type=int, default=None, help='Max parallel LLM requests per endpoint')
+    parser.add_argument('--sample_timeout', type=float, default=None, help='Time limit in seconds for each test sample')
+    parser.add_argument('--sample_memory_mb', type=int, default=None, help='Memory limit in MB for each test sample')
+    parser.add_argument('--sandbox_workers', type=int, default=None, help='Number of processes running test samples')
+    parser.add_argument('--cache', type=str, default='false', help='if LLM responses will be cached on disk')
+    parser.add_argument('--cache_path', type=str, default='llm_cache.sqlite3', help='The sqlite file of the LLM response cache')
+    parser.add_argument('--example_tokens', type=int, default=None, help='Token budget of the memory examples in one agent prompt')
+    parser.add_argument('--embedding_backend', type=str, default=None, choices=['sentence_transformers', 'onnx'], help='Backend of the memory embedding model')
+    parser.add_argument('--profile-startup', '--profile_startup', dest='profile_startup', action='store_true', help='Print the time spent importing each subsystem')
+    args = parser.parse_args(argv)
     args.algorithm = args.algorithm.lower()
+    return args
 
-    #catogory = args.dataset
-    use_memory = True if args.use == 'true' else False
-    use_ab_memory = True if args.useab == 'true' else False
-    test_shift = True if use_ab_memory==True and use_memory==False else False
-    record_memory = True if args.record == 'true' else False
-    evolve = True if args.evolve == 'true' else False
-    forget = True if args.forget == 'true' else False
-    check = True if args.check == 'true' else False
 
-    matched_problems = []
-    for p in os.listdir(os.path.join('dataset', args.dataset)):
-        if args.problem == p:
-            matched_problems.append(p)
-    total_num = len(matched_problems)
-    if total_num == 0:
-        print('No problem matched! Please check arguements.')
-        exit(0)
+def uses_memory(args):
+    """Whether a run with these arguments reads or writes the memory system."""
+    if args.record == 'true':
+        return True
+    if args.algorithm in ('chain_of_agents', 'coe'):
+        return args.use == 'true' or args.useab == 'true'
+    return False
+
+
+def build_memory_system(model):
+    """Load the memory system (ChromaDB client, embedding model and notes) once."""
+    AgenticMemorySystemRB = lazy_import('agentic_memory_rb.memory_system_rb').AgenticMemorySystemRB
+    return AgenticMemorySystemRB(
+        dir_memory="memory",
+        model_name='all-MiniLM-L6-v2',
+        llm_name=model,
+        category_abstruct_memory_num=1,
+    )
+
 
+def make_log_path(args):
     Path(args.log_dir).mkdir(parents=True, exist_ok=True)
     log_dir_name = f'run_{args.algorithm}_{args.dataset}_{str(round(time.time()))}'
     path = os.path.join(args.log_dir, log_dir_name)
     print(f'Save log to {path}')
     Path(path).mkdir(parents=True, exist_ok=True)
+    return path
 
-    # initialize with memory system
-    memory_system = AgenticMemorySystemRB(
-        dir_memory="memory",
-        model_name='all-MiniLM-L6-v2',
-        llm_name=args.model,
-        category_abstruct_memory_num=1,
-    )
 
-    print("\nProcessing memory...\n")
-    memory_system.process_memory('memory')
-    print("\nMemory processed.\n")
+def evolve_abstruct_memory(memory_system, description, summary, catogory, evolve_async):
+    """Evolve the abstract memories of `catogory`, in the background if `evolve_async`.
 
-    correct_num = 0
-    ce_num = 0
-    re_num = 0
-    pbar = tqdm(total=len(matched_problems))
-    current_num = 0
-    selector=Selector(args.model)
-    summarizer = Summarizer(args.model)
-    for problem in matched_problems:
-        comment_log_formemory=''
-        problem_data = read_problem(args.dataset, problem)
-        with get_openai_callback() as cb:
-            if args.algorithm == 'chain_of_agents' or args.algorithm == 'coe':
-                #catogory_str=selector.forward(problem_data['description'])
-                #catogory=extract_or_assign_classification(catogory_str)
-                catogory = args.dataset  # 直接使用数据集名称作为类别
-                print(f'匹配到类型：{catogory}')
-                mode = 1
-                selected_memory_note=memory_system.select_memory_bycatogory_content(problem_data['description'],catogory,k=1,tolerance_level=0)
-                if use_memory == False:
-                    selected_memory_note = []
-                if len(selected_memory_note)==0:
-                    mode = 2
-                    selected_memory_note=memory_system.select_abstruct_memory_bycatogory_distance(catogory,test_shift=test_shift,target_num=2,tolerance_level=2)
-                if use_ab_memory == False:
-                    selected_memory_note = []
-                answer,comment_log_formemory,comment_log_forcode = chain_of_agents(
-                    problem_data, 
-                    args.max_collaborate_nums, 
-                    model_name=args.model,
-                    mode = mode,
-                    memory_notes=selected_memory_note)
-                
-                time.sleep(10)
-                
+    Return:
+        (renew_summary, future): the renewed summary, or a future of it when
+        the evolution runs in the background
+    """
+    if evolve_async:
+        return None, memory_system.submit_evolving_abstruct_memory(description, summary, catogory)
+    return memory_system.evolving_abstruct_memory(description=description, summary=summary, category=catogory), None
+
+
+def write_renew_summary(path, problem, renew_summary):
+    with open(os.path.join(path, f'{problem}_renew_summary.txt'), 'w', encoding='utf8',errors='ignore') as f:
+        f.write(renew_summary or 'null')
+
+
+def memory_job_id(args, problem):
+    """Id of the memory update of one problem, the same for every retry of it."""
+    flags = '_'.join(getattr(args, key) for key in ('use', 'useab', 'record', 'evolve', 'forget', 'check'))
+    return f'{args.algorithm}/{args.dataset}/{problem}/{flags}'
+
+
+def run_problem(args, problem, path, memory_system, summarizer=None, memory_lock=None, maintenance=None):
+    """Solve, test and record a single problem, writing its logs under `path`.
+
+    Args:
+        args: parsed arguments of `parse_args`
+        problem: problem folder name, e.g. 'prob_0'
+        path: log directory of this run
+        memory_system: a loaded AgenticMemorySystemRB shared between runs, or
+            None when `uses_memory(args)` is False
+        summarizer: Summarizer instance, a new one is created if None
+        memory_lock: lock guarding memory reads and updates when runs share the memory system;
+            required with `maintenance`, whose updates run concurrently with later problems
+        maintenance: MemoryMaintenanceWorker; when given, summarizing and
+            updating the memory run on it after this function returns
+
+    Return:
+        result: Result of the sample tests
+    """
+    if maintenance is not None and memory_lock is None:
+        raise ValueError('run_problem with maintenance needs a memory_lock shared with the maintenance jobs')
+    memory_lock = memory_lock or nullcontext()
+    summarizer = summarizer or lazy_import('Summarizer').Summarizer(args.model)
+    get_openai_callback = lazy_import('langchain.callbacks').get_openai_callback
+
+    use_memory = True if args.use == 'true' else False
+    use_ab_memory = True if args.useab == 'true' else False
+    test_shift = True if use_ab_memory==True and use_memory==False else False
+    record_memory = True if args.record == 'true' else False
+    evolve = True if args.evolve == 'true' else False
+    forget = True if args.forget == 'true' else False
+    check = True if args.check == 'true' else False
+    evolve_async = True if args.evolve_async == 'true' else False
+
+    catogory = args.dataset  # 直接使用数据集名称作为类别
+    comment_log_formemory = ''
+    comment_log_forcode = ''
+    selected_memory_note = []
+    collaboration_stats = {}
+    problem_data = read_problem(args.dataset, problem)
+    with get_openai_callback() as cb:
+        if args.algorithm == 'chain_of_agents' or args.algorithm == 'coe':
+            #catogory_str=selector.forward(problem_data['description'])
+            #catogory=extract_or_assign_classification(catogory_str)
+            print(f'匹配到类型：{catogory}')
+            mode = 1
+            if memory_system is not None:
+                with memory_lock:
+                    selected_memory_note=memory_system.select_memory_bycatogory_content(problem_data['description'],catogory,k=1,tolerance_level=0)
+                    if use_memory == False:
+                        selected_memory_note = []
+                    if len(selected_memory_note)==0:
+                        mode = 2
+                        selected_memory_note=memory_system.select_abstruct_memory_bycatogory_distance(catogory,test_shift=test_shift,target_num=2,tolerance_level=2)
+                    if use_ab_memory == False:
+                        selected_memory_note = []
+                    if mode == 1 and len(selected_memory_note) > 0:
+                        # 只统计真正放入提示词的具体记忆
+                        memory_system.record_retrieval(selected_memory_note)
             else:
-                if args.algorithm == "reflexion":
-                    algorithm = algorithms[args.algorithm]
-                    answer = algorithm.solve(problem_data,args.dataset, problem, model_name=args.model)
-                else:
-                    algorithm = algorithms[args.algorithm]
-                    answer = algorithm.solve(problem_data, model_name=args.model)
+                mode = 2
+            skip_reducer = args.skip_reducer == 'true'
+            sample_inputs = None
+            if skip_reducer or args.num_candidates > 1:
+                sample_inputs = [sample['input'] for sample in read_test_samples(args.dataset, problem)]
+            chain_of_agents = lazy_import('main').chain_of_agents
+            answer,comment_log_formemory,comment_log_forcode = chain_of_agents(
+                problem_data, 
+                args.max_collaborate_nums, 
+                model_name=args.model,
+                mode = mode,
+                memory_notes=selected_memory_note,
+                routing=args.routing,
+                stop_criteria=args.stop_criteria,
+                run_stats=collaboration_stats,
+                sample_inputs=sample_inputs,
+                skip_reducer=skip_reducer,
+                num_candidates=args.num_candidates,
+                comment_log_path=os.path.join(path, f'{problem}_comment_log.txt'))
             
-            print('-' * 10 + 'Token usage' + '-' * 20)
-            print(cb)
-            print('-' * 25)
-        # print("问题分配结果",answer)
-        # print("总结内容：")
-        # print(summary)
+        else:
+            if args.algorithm == "reflexion":
+                algorithm = lazy_import(algorithms[args.algorithm])
+                answer = algorithm.solve(problem_data,args.dataset, problem, model_name=args.model)
+            else:
+                algorithm = lazy_import(algorithms[args.algorithm])
+                answer = algorithm.solve(problem_data, model_name=args.model)
+        
+        print('-' * 10 + 'Token usage' + '-' * 20)
+        print(cb)
+        print('-' * 25)
+    # print("问题分配结果",answer)
+    # print("总结内容：")
+    # print(summary)
 
 
-        with open(os.path.join(path, f'{problem}_original_answer.txt'), 'w', encoding='utf8',errors='ignore') as f:
-            f.write(answer)
-        
-        code = extract_code_from_string(answer)
-        code = code.replace('inrange', 'in range')
-        
-        
-        with open(os.path.join(path, f'{problem}_generated_code.py'), 'w', encoding='utf8',errors='ignore') as f:
-            f.write(code)
+    with open(os.path.join(path, f'{problem}_original_answer.txt'), 'w', encoding='utf8',errors='ignore') as f:
+        f.write(answer)
+    
+    code = extract_code_from_string(answer)
+    code = code.replace('inrange', 'in range')
+    
+    
+    with open(os.path.join(path, f'{problem}_generated_code.py'), 'w', encoding='utf8',errors='ignore') as f:
+        f.write(code)
 
-        with open('generated_code.py', 'w',encoding='utf8', errors='ignore') as f:
-            f.write(code)
+    with open(os.path.join(path, f'{problem}_analysis.txt'), 'w', encoding='utf8',errors='ignore') as f:
+        f.write(comment_log_formemory)
 
-        with open(os.path.join(path, f'{problem}_analysis.txt'), 'w', encoding='utf8',errors='ignore') as f:
-            f.write(comment_log_formemory)
+    
+    if collaboration_stats:
+        with open(os.path.join(path, f'{problem}_collaboration.txt'), 'w', encoding='utf8',errors='ignore') as f:
+            for key, value in collaboration_stats.items():
+                f.write(f'{key}: {value}\n')
 
-        
-        with open(os.path.join(path, f'{problem}_using_memory.txt'), 'w', encoding='utf8',errors='ignore') as f:
-            f.write(f'use_memory: {use_memory}    use_abstruct_memory: {use_ab_memory}\n')
-            if selected_memory_note != None and len(selected_memory_note) != 0:
-                for note in selected_memory_note:
-                    f.write(note.id)
-                    f.write('\n')
-                    f.write(note.memory_level)
-
-
-        test_samples = read_test_samples(args.dataset, problem)
-        with open(os.path.join(path, f'{problem}_test_log.txt'), 'w', encoding='utf8', errors='ignore') as f:
-            result = test_generated_code(problem, test_samples, f)
+    with open(os.path.join(path, f'{problem}_using_memory.txt'), 'w', encoding='utf8',errors='ignore') as f:
+        f.write(f'use_memory: {use_memory}    use_abstruct_memory: {use_ab_memory}\n')
+        if selected_memory_note != None and len(selected_memory_note) != 0:
+            for note in selected_memory_note:
+                f.write(note.id)
+                f.write('\n')
+                f.write(note.memory_level)
+
+
+    test_samples = read_test_samples(args.dataset, problem)
+    with open(os.path.join(path, f'{problem}_test_log.txt'), 'w', encoding='utf8', errors='ignore') as f:
+        result = test_generated_code(problem, code, test_samples, f)
+
+    def maintain_memory():
+        """Summarize the run and apply it to the memory system."""
         renew_summary = 'null'
+        renew_future = None
         if result == Result.ACCEPT:
             summary = summarizer.forward(problem_data['description'],comment_log_formemory,True)
         elif result == Result.WRONG_ANSWER:
@@ -217,38 +326,100 @@ def main():
             summary = summarizer.forward(problem_data['description'],comment_log_forcode,False)
 
         if record_memory:
-            existing_abstruct_memory=memory_system.select_abstruct_memory_bycatogory(catogory)
-            if evolve and check:
-                if len(existing_abstruct_memory)==0:
-                    memory_system.add_abstruct_note(summary=summary,category=catogory)
-                else:
-                    renew_summary = memory_system.evolving_abstruct_memory(description=problem_data['description'],
-                                                   summary=summary,
-                                                   category=catogory)
-            elif evolve and not check:
-                if result == Result.ACCEPT:
+            with memory_lock:
+                existing_abstruct_memory=memory_system.select_abstruct_memory_bycatogory(catogory)
+                if evolve and check:
                     if len(existing_abstruct_memory)==0:
                         memory_system.add_abstruct_note(summary=summary,category=catogory)
                     else:
-                        renew_summary = memory_system.evolving_abstruct_memory(description=problem_data['description'],
-                                                       summary=summary,
-                                                       category=catogory)
-            elif not evolve and check:
-                memory_system.add_abstruct_note(summary=summary,category=catogory)
-            
-            else:
-                if result == Result.ACCEPT:
+                        renew_summary, renew_future = evolve_abstruct_memory(memory_system, problem_data['description'], summary, catogory, evolve_async)
+                elif evolve and not check:
+                    if result == Result.ACCEPT:
+                        if len(existing_abstruct_memory)==0:
+                            memory_system.add_abstruct_note(summary=summary,category=catogory)
+                        else:
+                            renew_summary, renew_future = evolve_abstruct_memory(memory_system, problem_data['description'], summary, catogory, evolve_async)
+                elif not evolve and check:
                     memory_system.add_abstruct_note(summary=summary,category=catogory)
+            
+                else:
+                    if result == Result.ACCEPT:
+                        memory_system.add_abstruct_note(summary=summary,category=catogory)
 
                 
-            if result == Result.ACCEPT:
-                id=memory_system.add_note(description=problem_data['description'],
-                               analysis=comment_log_formemory,
-                               code=code,
-                               category=catogory)
-                if forget:
-                    memory_system.scoring_memory_bynewnote(new_note_id=id, addscore_num=2)
-                    memory_system.retrenching_memory_byscore(target_num=5)
+                if result == Result.ACCEPT:
+                    id=memory_system.add_note(description=problem_data['description'],
+                                   analysis=comment_log_formemory,
+                                   code=code,
+                                   category=catogory)
+                    if forget:
+                        memory_system.scoring_memory_bynewnote(new_note_id=id, addscore_num=2)
+                        memory_system.forget(build_eviction_policy(args.forget_policy, args.forget_keep, args.memory_budget_tokens))
+                # scores are buffered in the score store, write them once per problem
+                memory_system.flush()
+
+        with open(os.path.join(path, f'{problem}_summary.txt'), 'w', encoding='utf8',errors='ignore') as f:
+            f.write(summary)
+    
+        if renew_future is None:
+            write_renew_summary(path, problem, renew_summary)
+        else:
+            # written once the background evolution has finished
+            renew_future.add_done_callback(
+                lambda future: write_renew_summary(path, problem, None if future.exception() else future.result()))
+
+    if maintenance is not None:
+        maintenance.submit(memory_job_id(args, problem), maintain_memory)
+    else:
+        maintain_memory()
+
+    return result
+
+
+def main():
+    args = parse_args()
+    configure_llm_limits(rate=args.llm_rate, max_concurrency=args.llm_concurrency)
+    llm_cache = configure_llm_cache(args.cache_path if args.cache == 'true' else None)
+    configure_sandbox(num_workers=args.sandbox_workers, timeout=args.sample_timeout, memory_limit_mb=args.sample_memory_mb)
+    configure_embedding_backend(args.embedding_backend)
+    if args.example_tokens is not None:
+        configure_prompt_budget(example_tokens=args.example_tokens)
+    # start the test workers before the memory system loads torch
+    get_default_pool()
+
+    matched_problems = []
+    for p in os.listdir(os.path.join('dataset', args.dataset)):
+        if args.problem == p:
+            matched_problems.append(p)
+    total_num = len(matched_problems)
+    if total_num == 0:
+        print('No problem matched! Please check arguements.')
+        exit(0)
+
+    path = make_log_path(args)
+
+    # initialize with memory system, which loads the memory notes
+    memory_system = build_memory_system(args.model) if uses_memory(args) else None
+    summarizer = lazy_import('Summarizer').Summarizer(args.model)
+    tqdm = lazy_import('tqdm').tqdm
+    maintenance = None
+    memory_lock = None
+    if args.async_memory == 'true':
+        maintenance = lazy_import('agentic_memory_rb.maintenance').MemoryMaintenanceWorker()
+        # the worker updates the memory while the next problem reads it
+        memory_lock = threading.RLock()
+    if args.profile_startup:
+        print_startup_profile()
+
+    correct_num = 0
+    ce_num = 0
+    re_num = 0
+    tle_num = 0
+    pbar = tqdm(total=len(matched_problems))
+    current_num = 0
+    for problem in matched_problems:
+        result = run_problem(args, problem, path, memory_system, summarizer=summarizer,
+                             memory_lock=memory_lock, maintenance=maintenance)
 
         if result == Result.ACCEPT:
             correct_num += 1
@@ -256,21 +427,26 @@ def main():
             ce_num += 1
         elif result == Result.RUNTIME_ERROR:
             re_num += 1
-        
-        with open(os.path.join(path, f'{problem}_summary.txt'), 'w', encoding='utf8',errors='ignore') as f:
-            f.write(summary)
-        
-        with open(os.path.join(path, f'{problem}_renew_summary.txt'), 'w', encoding='utf8',errors='ignore') as f:
-            f.write(renew_summary)
+        elif result == Result.TIMEOUT:
+            tle_num += 1
 
         pbar.update()
         current_num += 1
         pbar.set_description(f'Accuracy: {correct_num / current_num * 100:.2f}% | Compile error: {ce_num / current_num * 100:.2f}% | Runtime error: {re_num / current_num * 100:.2f}%')
 
+    if maintenance is not None:
+        print(f'Waiting for {maintenance.pending()} memory updates...')
+        maintenance.flush()
+        for job_id, error in maintenance.failed_jobs().items():
+            print(f'Memory update {job_id} was not applied: {type(error).__name__}: {error}')
+
     print(f'Passed: {correct_num}/{total_num}')
     print(f'Accuracy: {correct_num / total_num * 100:.2f}%')
     print(f'Compile error: {ce_num / total_num * 100:.2f}%')
     print(f'Runtime error{re_num / total_num * 100:.2f}%')
+    print(f'Time limit exceeded: {tle_num / total_num * 100:.2f}%')
+    if llm_cache is not None:
+        print(f'LLM cache: {llm_cache.stats()}')
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,243 @@
+"""In-process batch runner.
+
+Unlike run_exp_batch_insist.py, which launches `python run_exp.py` once per
+problem, this runner imports the solver stack, loads AgenticMemorySystemRB and
+its embedding model a single time and dispatches problems to a pool of worker
+threads. Failed problems are moved to the end of the queue and retried until
+they succeed, and each problem still writes its logs to log/run_*.
+"""
+import argparse
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+import run_exp
+from agents.llm_call import configure_llm_limits
+from agents.llm_cache import configure_llm_cache, get_llm_cache
+from agents.prompt_budget import configure_prompt_budget
+from sandbox import configure_sandbox, get_default_pool
+from stop_criteria import STOP_CRITERIA
+from agentic_memory_rb.embedding_models import configure_embedding_backend
+from agentic_memory_rb.maintenance import MemoryMaintenanceWorker
+
+DATASETS = [
+    'MT_MR_TA',
+    'MT_SR_TA',
+    'ST_SR_IA',
+    'MT_MR_IA',
+    'ST_SR_TA',
+    'ST_MR_TA',
+    'ST_MR_IA',
+    'MT_SR_IA',
+]
+
+FLAG_KEYS = ('use', 'useab', 'record', 'check', 'evolve', 'forget')
+
+
+def build_tasks(datasets_configs, num_problems_per_dataset, random_order=False):
+    """Expand dataset configs into a list of per-problem task dicts."""
+    num_problems_per_dataset = min(num_problems_per_dataset, 25)
+    tasks = []
+    for config in datasets_configs:
+        for i in range(num_problems_per_dataset):
+            params = {'dataset': config['dataset'], 'problem': f'prob_{i}'}
+            for key in FLAG_KEYS:
+                params[key] = config.get(key, 'true')
+            params['retry_count'] = 0
+            tasks.append(params)
+    if random_order:
+        random.shuffle(tasks)
+    return tasks
+
+
+def task_to_argv(params, model, algorithm='coe', log_dir='log', max_collaborate_nums=5, routing='llm', stop_criteria=(),
+                 skip_reducer=False, num_candidates=1):
+    argv = ['--algorithm', algorithm, '--model', model, '--log_dir', log_dir,
+            '--max_collaborate_nums', str(max_collaborate_nums), '--routing', routing]
+    if stop_criteria:
+        argv += ['--stop_criteria', *stop_criteria]
+    if skip_reducer:
+        argv += ['--skip_reducer', 'true']
+    if num_candidates > 1:
+        argv += ['--num_candidates', str(num_candidates)]
+    for key, value in params.items():
+        if key == 'retry_count':
+            continue
+        argv += [f'--{key}', str(value)]
+    return argv
+
+
+class PoolRunner:
+    """Runs problems against one shared memory system with a worker pool."""
+
+    def __init__(self, model='deepseek-ai/DeepSeek-V3', workers=1, algorithm='coe',
+                 log_dir='log', max_collaborate_nums=5, result_file='batch_result.txt',
+                 async_memory=False, routing='llm', stop_criteria=(), skip_reducer=False,
+                 num_candidates=1):
+        self.model = model
+        self.workers = max(1, workers)
+        self.algorithm = algorithm
+        self.log_dir = log_dir
+        self.max_collaborate_nums = max_collaborate_nums
+        self.result_file = result_file
+        self.routing = routing
+        self.stop_criteria = list(stop_criteria)
+        self.skip_reducer = skip_reducer
+        self.num_candidates = num_candidates
+
+        # all runs share one memory system, so memory reads/updates are serialized
+        self.memory_lock = threading.RLock()
+        self._result_file_lock = threading.Lock()
+        # memory updates of finished problems are applied in the background, in order
+        self.maintenance = MemoryMaintenanceWorker() if async_memory else None
+
+        # start the test workers before the memory system loads torch
+        get_default_pool()
+
+        print('Loading memory system...')
+        start_time = time.time()
+        self.memory_system = run_exp.build_memory_system(model)
+        print(f'Memory system loaded in {time.time() - start_time:.1f}s')
+
+    def run_task(self, params):
+        args = run_exp.parse_args(task_to_argv(
+            params, self.model, self.algorithm, self.log_dir, self.max_collaborate_nums,
+            self.routing, self.stop_criteria, self.skip_reducer,
+            self.num_candidates))
+        path = run_exp.make_log_path(args)
+        return run_exp.run_problem(
+            args, args.problem, path, self.memory_system,
+            memory_lock=self.memory_lock, maintenance=self.maintenance)
+
+    def _record_success(self, params, timerecord):
+        with self._result_file_lock:
+            with open(self.result_file, 'a', encoding='utf-8', errors='ignore') as f:
+                f.write(f"dataset: {params['dataset']}   problem: {params['problem']}  time:{timerecord}\n")
+
+    def run(self, tasks):
+        """Run all tasks, re-queueing failed ones until every task succeeds.
+
+        Return:
+            (success_count, remaining): number of finished tasks and the list of
+            tasks still queued when the run was interrupted
+        """
+        task_queue = deque(tasks)
+        total_initial_tasks = len(task_queue)
+        success_count = 0
+        running = {}
+
+        print(f'Runner started, {total_initial_tasks} tasks, {self.workers} workers')
+        executor = ThreadPoolExecutor(max_workers=self.workers)
+        try:
+            while task_queue or running:
+                while task_queue and len(running) < self.workers:
+                    params = task_queue.popleft()
+                    info = f"[{params['dataset']}-{params['problem']}-ab{params['useab']}]"
+                    if params['retry_count'] > 0:
+                        print(f"{info} retry #{params['retry_count']}")
+                    future = executor.submit(self.run_task, params)
+                    running[future] = (params, info, time.time())
+
+                done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in done:
+                    params, info, start_time = running.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        print(f'{info} failed: {type(e).__name__}: {e}')
+                        params['retry_count'] += 1
+                        task_queue.append(params)
+                        print(f'{info} moved to the end of the queue')
+                        continue
+                    timerecord = time.time() - start_time
+                    success_count += 1
+                    print(f'{info} finished: {result.name} ({timerecord:.1f}s), '
+                          f'{len(task_queue) + len(running)} tasks left')
+                    self._record_success(params, timerecord)
+        except KeyboardInterrupt:
+            print('\nStopped by user, waiting for running tasks...')
+            task_queue.extend(params for params, _, _ in running.values())
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+            if self.maintenance is not None:
+                print(f'Waiting for {self.maintenance.pending()} memory updates...')
+                self.maintenance.flush()
+                for job_id, error in self.maintenance.failed_jobs().items():
+                    print(f'Memory update {job_id} was not applied: {type(error).__name__}: {error}')
+
+        print(f"\n{'=' * 60}")
+        print(f'Finished: {success_count} / {total_initial_tasks}')
+        print(f'Remaining: {len(task_queue)}')
+        for t in list(task_queue)[:5]:
+            print(f"  - {t['dataset']} {t['problem']} (retries: {t['retry_count']})")
+        if get_llm_cache() is not None:
+            print(f'LLM cache: {get_llm_cache().stats()}')
+        print('=' * 60)
+        return success_count, list(task_queue)
+
+
+def run_batch(datasets_configs, num_problems_per_dataset=25, workers=1, random_order=False, **runner_kwargs):
+    tasks = build_tasks(datasets_configs, num_problems_per_dataset, random_order)
+    runner = PoolRunner(workers=workers, **runner_kwargs)
+    return runner.run(tasks)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the benchmark in one process with a worker pool.')
+    parser.add_argument('--datasets', nargs='+', default=DATASETS, help='Datasets to run')
+    parser.add_argument('--num', type=int, default=25, help='Number of problems per dataset')
+    parser.add_argument('--workers', type=int, default=1, help='Number of problems solved concurrently')
+    parser.add_argument('--model', type=str, default='deepseek-ai/DeepSeek-V3', help='Base large language model')
+    parser.add_argument('--algorithm', type=str, default='coe', help='Algorithm name')
+    parser.add_argument('--log_dir', type=str, default='log', help='The directory of log')
+    parser.add_argument('--max_collaborate_nums', type=int, default=5, help='Number of max collaborations')
+    parser.add_argument('--routing', type=str, default='llm', choices=['llm', 'pipeline', 'rule'], help='How the next agent is chosen in each collaboration round')
+    parser.add_argument('--stop_criteria', type=str, nargs='*', default=[], choices=list(STOP_CRITERIA), help='Criteria ending the collaboration before max_collaborate_nums rounds')
+    parser.add_argument('--random_order', action='store_true', help='Shuffle the problem order')
+    parser.add_argument('--llm_rate', type=float, default=None, help='Max LLM requests per second per endpoint')
+    parser.add_argument('--llm_concurrency', type=int, default=None, help='Max parallel LLM requests per endpoint')
+    parser.add_argument('--sample_timeout', type=float, default=None, help='Time limit in seconds for each test sample')
+    parser.add_argument('--sample_memory_mb', type=int, default=None, help='Memory limit in MB for each test sample')
+    parser.add_argument('--sandbox_workers', type=int, default=None, help='Number of processes running test samples')
+    parser.add_argument('--cache', type=str, default='false', help='if LLM responses will be cached on disk')
+    parser.add_argument('--cache_path', type=str, default='llm_cache.sqlite3', help='The sqlite file of the LLM response cache')
+    parser.add_argument('--async_memory', type=str, default='false', help='if memory updates run in the background instead of between problems')
+    parser.add_argument('--skip_reducer', type=str, default='false', help='if the Developer code is used without the Reducer when it runs on the sample inputs')
+    parser.add_argument('--num_candidates', type=int, default=1, help='Number of final answers generated concurrently, the first that runs on the sample inputs is used')
+    parser.add_argument('--example_tokens', type=int, default=None, help='Token budget of the memory examples in one agent prompt')
+    parser.add_argument('--embedding_backend', type=str, default=None, choices=['sentence_transformers', 'onnx'], help='Backend of the memory embedding model')
+    for key in FLAG_KEYS:
+        parser.add_argument(f'--{key}', type=str, default='true', help=f'run_exp.py --{key} flag')
+    args = parser.parse_args()
+    configure_llm_limits(rate=args.llm_rate, max_concurrency=args.llm_concurrency)
+    configure_llm_cache(args.cache_path if args.cache.lower() == 'true' else None)
+    configure_sandbox(num_workers=args.sandbox_workers, timeout=args.sample_timeout, memory_limit_mb=args.sample_memory_mb)
+    configure_embedding_backend(args.embedding_backend)
+    if args.example_tokens is not None:
+        configure_prompt_budget(example_tokens=args.example_tokens)
+
+    datasets_configs = [
+        {'dataset': ds, **{key: getattr(args, key).lower() for key in FLAG_KEYS}}
+        for ds in args.datasets
+    ]
+    run_batch(
+        datasets_configs,
+        num_problems_per_dataset=args.num,
+        workers=args.workers,
+        random_order=args.random_order,
+        model=args.model,
+        algorithm=args.algorithm,
+        log_dir=args.log_dir,
+        max_collaborate_nums=args.max_collaborate_nums,
+        async_memory=args.async_memory.lower() == 'true',
+        routing=args.routing,
+        stop_criteria=args.stop_criteria,
+        skip_reducer=args.skip_reducer.lower() == 'true',
+        num_candidates=args.num_candidates,
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,277 @@
+"""Process pool for running LLM-generated code.
+
+Each test sample runs in one of a fixed set of pre-started worker processes,
+with its own wall-clock limit and (on POSIX) address-space limit. A worker
+that exceeds its time limit or dies is killed and replaced, so a runaway
+Gurobi model or an infinite loop only costs that sample. Samples of one
+problem are dispatched concurrently and come back as SampleRecord objects.
+A run whose result is no longer needed can be abandoned by setting its
+cancel event: its workers are killed and replaced like timed-out ones.
+
+Generated code is passed around as a string and compiled into a fresh module
+object in the worker, so no file is shared between concurrent evaluations.
+
+Workers are started with the forkserver method (spawn where it is not
+available) rather than forked from the runner: the runner has threads and
+may have loaded torch by the time a worker is replaced, and forking such a
+process can deadlock the child.
+"""
+import atexit
+import multiprocessing
+import os
+import queue
+import threading
+import time
+import types
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, List
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+# statuses of SampleRecord
+OK = 'ok'
+COMPILE_ERROR = 'compile_error'
+RUNTIME_ERROR = 'runtime_error'
+MEMORY_ERROR = 'memory_error'
+TIMEOUT = 'timeout'
+CANCELLED = 'cancelled'
+
+# seconds between checks of a cancel event while waiting for a worker
+CANCEL_POLL_INTERVAL = 0.05
+
+
+@dataclass
+class SampleRecord:
+    index: int
+    status: str
+    output: Any = None
+    error: str = ''
+    elapsed: float = 0.0
+
+
+def _set_memory_limit(memory_limit_mb):
+    if resource is None:
+        return
+    _, hard = resource.getrlimit(resource.RLIMIT_AS)
+    if memory_limit_mb is None:
+        soft = hard
+    else:
+        soft = int(memory_limit_mb) * 1024 * 1024
+        if hard != resource.RLIM_INFINITY:
+            soft = min(soft, hard)
+    resource.setrlimit(resource.RLIMIT_AS, (soft, hard))
+
+
+def _get_context():
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+
+
+def load_generated_module(code, name='generated_code'):
+    """Compile `code` into a new module object without touching the file system."""
+    module = types.ModuleType(name)
+    module.__file__ = f'<{name}>'
+    exec(compile(code, module.__file__, 'exec'), module.__dict__)
+    return module
+
+
+def _run_task(task):
+    code, func_name, kwargs, memory_limit_mb = task
+    start_time = time.time()
+    # limit memory before the module runs, its top-level code may allocate too
+    _set_memory_limit(memory_limit_mb)
+    try:
+        try:
+            module = load_generated_module(code, f'generated_{func_name}')
+        except MemoryError as e:
+            return MEMORY_ERROR, None, f'Memory limit exceeded\n{e}', time.time() - start_time
+        except BaseException as e:
+            return COMPILE_ERROR, None, f'There is grammar error in generated code!\n{e}', time.time() - start_time
+        try:
+            func = getattr(module, func_name)
+        except AttributeError as e:
+            return COMPILE_ERROR, None, f'Cannot load function!\n{e}', time.time() - start_time
+
+        output = func(**kwargs)
+        return OK, output, '', time.time() - start_time
+    except MemoryError as e:
+        return MEMORY_ERROR, None, f'Memory limit exceeded\n{e}', time.time() - start_time
+    except BaseException as e:
+        return RUNTIME_ERROR, None, str(e), time.time() - start_time
+    finally:
+        _set_memory_limit(None)
+
+
+def _worker_main(conn):
+    while True:
+        try:
+            task = conn.recv()
+        except (EOFError, OSError):
+            break
+        if task is None:
+            break
+        record = _run_task(task)
+        try:
+            conn.send(record)
+        except Exception as e:
+            status, _, _, elapsed = record
+            conn.send((RUNTIME_ERROR, None, f'Cannot send program output back ({status}): {e}', elapsed))
+
+
+class _Worker(object):
+
+    def __init__(self, ctx):
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(target=_worker_main, args=(child_conn,), daemon=True)
+        self.process.start()
+        child_conn.close()
+
+    def kill(self):
+        try:
+            self.process.kill()
+            self.process.join(timeout=5)
+        except Exception:
+            pass
+        self.conn.close()
+
+
+class SandboxPool(object):
+
+    def __init__(self, num_workers=None, timeout=600.0, memory_limit_mb=None):
+        """Start `num_workers` worker processes.
+
+        Args:
+            num_workers: number of worker processes, defaults to min(4, cpu count)
+            timeout: default wall-clock limit per sample in seconds
+            memory_limit_mb: default address-space limit per sample, None for no limit
+        """
+        self.num_workers = num_workers or min(4, os.cpu_count() or 1)
+        self.timeout = timeout
+        self.memory_limit_mb = memory_limit_mb
+        self._ctx = _get_context()
+        self._idle = queue.Queue()
+        for _ in range(self.num_workers):
+            self._idle.put(_Worker(self._ctx))
+        self._executor = ThreadPoolExecutor(max_workers=self.num_workers)
+        self._closed = False
+
+    def _get_worker(self, cancel_event):
+        """Take an idle worker, or None if `cancel_event` is set while waiting."""
+        if cancel_event is None:
+            return self._idle.get()
+        while not cancel_event.is_set():
+            try:
+                return self._idle.get(timeout=CANCEL_POLL_INTERVAL)
+            except queue.Empty:
+                pass
+        return None
+
+    @staticmethod
+    def _wait_result(conn, timeout, cancel_event):
+        """Wait for the worker's result; False on timeout or cancellation."""
+        if cancel_event is None:
+            return conn.poll(timeout)
+        deadline = time.time() + timeout
+        while not cancel_event.is_set():
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                return False
+            if conn.poll(min(remaining, CANCEL_POLL_INTERVAL)):
+                return True
+        return False
+
+    def _run_one(self, index, task, timeout, cancel_event=None):
+        start_time = time.time()
+        worker = self._get_worker(cancel_event)
+        if worker is None:
+            return SampleRecord(index, CANCELLED, error='Cancelled before start')
+        try:
+            worker.conn.send(task)
+            if self._wait_result(worker.conn, timeout, cancel_event):
+                status, output, error, elapsed = worker.conn.recv()
+                return SampleRecord(index, status, output, error, elapsed)
+            # timed out or abandoned: the worker may be stuck in the sample, replace it
+            worker.kill()
+            worker = _Worker(self._ctx)
+            if cancel_event is not None and cancel_event.is_set():
+                return SampleRecord(index, CANCELLED, error='Cancelled', elapsed=time.time() - start_time)
+            return SampleRecord(index, TIMEOUT, error=f'Time limit exceeded ({timeout}s)', elapsed=timeout)
+        except (EOFError, OSError) as e:
+            # the worker died, e.g. killed by the OS or a crash in native code
+            exitcode = worker.process.exitcode
+            worker.kill()
+            worker = _Worker(self._ctx)
+            return SampleRecord(index, RUNTIME_ERROR, error=f'Worker process died (exit code {exitcode}): {e}')
+        finally:
+            self._idle.put(worker)
+
+    def run_samples(self, code, func_name, inputs, timeout=None, memory_limit_mb=None,
+                    cancel_event=None) -> List[SampleRecord]:
+        """Call `func_name` defined in `code` once per input, in parallel.
+
+        Args:
+            code: source of the generated program
+            func_name: function to call
+            inputs: list of keyword-argument dicts, one per sample
+            timeout: wall-clock limit per sample, defaults to the pool setting
+            memory_limit_mb: memory limit per sample, defaults to the pool setting
+            cancel_event: threading.Event; once set, samples still running are
+                killed and samples not started are skipped, both as CANCELLED
+
+        Return:
+            records: one SampleRecord per input, in input order
+        """
+        timeout = timeout or self.timeout
+        memory_limit_mb = memory_limit_mb or self.memory_limit_mb
+        futures = [
+            self._executor.submit(self._run_one, i, (code, func_name, kwargs, memory_limit_mb), timeout, cancel_event)
+            for i, kwargs in enumerate(inputs)
+        ]
+        return [future.result() for future in futures]
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._executor.shutdown(wait=True)
+        while True:
+            try:
+                worker = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                worker.conn.send(None)
+            except Exception:
+                pass
+            worker.kill()
+
+
+_default_pool = None
+_default_pool_lock = threading.Lock()
+_default_pool_kwargs = {}
+
+
+def configure_sandbox(num_workers=None, timeout=None, memory_limit_mb=None):
+    """Set the options of the default pool. Call before the pool is first used."""
+    for key, value in (('num_workers', num_workers), ('timeout', timeout), ('memory_limit_mb', memory_limit_mb)):
+        if value is not None:
+            _default_pool_kwargs[key] = value
+
+
+def get_default_pool() -> SandboxPool:
+    """Process-wide pool, started on first use.
+
+    Start it early (before loading torch or spawning threads) to keep the
+    forked workers small.
+    """
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None:
+            _default_pool = SandboxPool(**_default_pool_kwargs)
+            atexit.register(_default_pool.close)
+        return _default_pool
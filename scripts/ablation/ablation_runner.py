@@ -1,9 +1,7 @@
 import argparse
+import os
 import pathlib
-import re
-import subprocess
 import sys
-import tempfile
 
 # Dataset list reused across all ablations
 DATASETS = [
@@ -17,51 +15,49 @@ DATASETS = [
     "MT_SR_IA",
 ]
 
-RUNNER_NAME = "run_exp_batch_insist.py"
+REPO_ROOT = pathlib.Path(__file__).resolve().parents[2]
 
 
-def run_ablation(tag, num_problems, *, use, useab, record, evolve, forget, check):
+def run_ablation(tag, num_problems, *, use, useab, record, evolve, forget, check, workers=1, cache=False):
     """
-    Patch run_exp_batch_insist.py in a temp copy with the given flags and run it.
+    Run an ablation in this process through run_exp_pool.PoolRunner, so the
+    memory system and embedding model are loaded once for the whole sweep.
+    With `cache` enabled, LLM responses are replayed from llm_cache.sqlite3
+    when the same prompts were already sent by an earlier ablation. It is off
+    by default: with it, arms replay each other's responses (failed attempts
+    included) and are no longer independent samples.
     """
-    repo_root = pathlib.Path(__file__).resolve().parents[2]
-    runner_path = repo_root / RUNNER_NAME
-    code = runner_path.read_text(encoding="utf-8")
+    # run_exp.py resolves dataset/ and log/ relative to the repository root
+    os.chdir(REPO_ROOT)
+    if str(REPO_ROOT) not in sys.path:
+        sys.path.insert(0, str(REPO_ROOT))
+    from run_exp_pool import run_batch
+    from agents.llm_cache import configure_llm_cache
+    configure_llm_cache('llm_cache.sqlite3' if cache else None)
 
-    block = "datasets_configs = [\n" + ",\n".join(
-        f"    {{'dataset': '{ds}', 'useab': '{useab}','use': '{use}','record': '{record}','check':'{check}','evolve':'{evolve}','forget':'{forget}'}}"
+    datasets_configs = [
+        {'dataset': ds, 'useab': useab, 'use': use, 'record': record, 'check': check, 'evolve': evolve, 'forget': forget}
         for ds in DATASETS
-    ) + "\n]\n"
+    ]
 
-    code = re.sub(r"datasets_configs = \[[\s\S]*?\]\n", block, code, count=1)
-    code = re.sub(r"num_problems_per_dataset = \d+", f"num_problems_per_dataset = {num_problems}", code, count=1)
-
-    print(f"[{tag}] use={use} useab={useab} record={record} evolve={evolve} forget={forget} check={check} num={num_problems}")
-    run_cmd = [sys.executable, "-c", code]
-    try:
-        tmp_dir = pathlib.Path(tempfile.gettempdir())
-        tmp_dir.mkdir(parents=True, exist_ok=True)
-        tmp = tmp_dir / f"{runner_path.stem}_{tag}.py"
-        tmp.write_text(code, encoding="utf-8")
-        run_cmd = [sys.executable, str(tmp)]
-    except Exception as exc:
-        print(f"[{tag}] temp file unavailable; running inline. ({type(exc).__name__})")
-
-    subprocess.run(run_cmd, check=True)
+    print(f"[{tag}] use={use} useab={useab} record={record} evolve={evolve} forget={forget} check={check} num={num_problems} workers={workers}")
+    return run_batch(datasets_configs, num_problems_per_dataset=num_problems, workers=workers)
 
 
 def main():
     parser = argparse.ArgumentParser(
-        description="Run an ablation by patching run_exp_batch_insist.py in a temp copy.",
+        description="Run an ablation with the in-process batch runner.",
     )
-    parser.add_argument("--tag", required=True, help="Name suffix for the temp script file")
+    parser.add_argument("--tag", required=True, help="Name of the ablation, used in the console output")
     parser.add_argument("--num", type=int, default=25, help="Number of problems per dataset")
+    parser.add_argument("--workers", type=int, default=1, help="Number of problems solved concurrently")
     parser.add_argument("--use", default="true", help="use memory (true/false)")
     parser.add_argument("--useab", default="true", help="use abstract memory (true/false)")
     parser.add_argument("--record", default="true", help="record/evolve memory (true/false)")
     parser.add_argument("--evolve", default="true", help="evolve abstract memory (true/false)")
     parser.add_argument("--forget", default="true", help="enable forgetting mechanism (true/false)")
     parser.add_argument("--check", default="true", help="enable memory check/correction (true/false)")
+    parser.add_argument("--cache", default="false", help="replay cached LLM responses (true/false)")
     args = parser.parse_args()
 
     run_ablation(
@@ -73,6 +69,8 @@ def main():
         evolve=args.evolve.lower(),
         forget=args.forget.lower(),
         check=args.check.lower(),
+        workers=args.workers,
+        cache=args.cache.lower() == "true",
     )
 
 
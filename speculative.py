@@ -0,0 +1,91 @@
+"""Speculative generation of the final answer.
+
+Instead of one Reducer call, `num_candidates` Reducers write the final code
+at the same time. Candidate 0 runs at temperature 0 like the single
+Reducer; the others sample at CANDIDATE_TEMPERATURE with their own seed, so
+their answers (and their LLM cache keys) differ. Each answer is checked as
+soon as it arrives and the first one that passes wins: the requests still
+in flight are cancelled and the checks still running are abandoned through
+their cancel event, so the winner does not wait for slower candidates. If no
+candidate passes, the answer of the lowest numbered candidate that returned
+one is used.
+"""
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, Tuple
+
+CANDIDATE_TEMPERATURE = 0.8
+
+
+def make_candidate_reducers(model_name, num_candidates, temperature=CANDIDATE_TEMPERATURE) -> List:
+    from reducer import Reducer
+    reducers = []
+    for i in range(num_candidates):
+        reducer = Reducer(model_name)
+        if i > 0:
+            reducer.llm.temperature = temperature
+            reducer.llm.model_kwargs = {**(reducer.llm.model_kwargs or {}), 'seed': i}
+        reducers.append(reducer)
+    return reducers
+
+
+async def _race(reducers, problem, comment_pool, check, executor, cancel_event):
+    loop = asyncio.get_running_loop()
+
+    async def generate_and_check(i, reducer):
+        answer = await reducer.aforward(problem, comment_pool)
+        # sandbox runs block, keep them off the event loop
+        code, reason = await loop.run_in_executor(executor, check, answer, cancel_event)
+        return i, answer, code is not None, reason
+
+    tasks = [asyncio.create_task(generate_and_check(i, reducer)) for i, reducer in enumerate(reducers)]
+    results = {}
+    errors = []
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            try:
+                i, answer, passed, reason = await next_done
+            except Exception as e:
+                print(f'Candidate failed: {type(e).__name__}: {e}')
+                errors.append(e)
+                continue
+            print(f'Candidate {i}: {"passed" if passed else "failed"}, {reason}')
+            results[i] = answer
+            if passed:
+                return answer, i, len(results)
+    finally:
+        cancel_event.set()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    if not results:
+        raise errors[0]
+    first = min(results)
+    return results[first], None, len(results)
+
+
+def generate_first_passing(reducers, problem, comment_pool,
+                           check: Callable[[str, threading.Event], Tuple[Optional[str], str]]):
+    """Run all reducers concurrently and keep the first answer that passes `check`.
+
+    Args:
+        reducers: Reducer per candidate, see make_candidate_reducers
+        problem: problem dict, passed to Reducer.forward as before
+        comment_pool: CommentPool of the collaboration
+        check: (answer, cancel_event) -> (code, reason), code is None if the
+            answer fails; it should return soon after cancel_event is set
+            (see sandbox.SandboxPool.run_samples)
+
+    Return:
+        (answer, winner, checked): the chosen answer, the index of the
+        passing candidate (None if none passed) and the number of answers checked
+    """
+    cancel_event = threading.Event()
+    # not the loop's default executor: asyncio.run would wait for every check in it
+    executor = ThreadPoolExecutor(max_workers=max(1, len(reducers)), thread_name_prefix='candidate_check')
+    try:
+        return asyncio.run(_race(reducers, problem, comment_pool, check, executor, cancel_event))
+    finally:
+        cancel_event.set()
+        executor.shutdown(wait=False, cancel_futures=True)
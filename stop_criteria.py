@@ -0,0 +1,78 @@
+"""Criteria for ending chain_of_agents before `max_collaborate_nums` rounds.
+
+Each criterion looks at the comment pool after a round and returns the
+reason to stop, or None to go on. The collaboration stops as soon as any of
+the enabled criteria holds.
+
+    all_commented: every agent has commented at least once
+    code_compiles: the Developer's last comment holds a function that compiles
+    converged:     the latest comment barely differs from the previous comment
+                   of the same agent
+"""
+import difflib
+
+from routing import CODE_AGENT_NAME, last_comment_of
+from utils import extract_code_from_string
+
+# similarity ratio from which two comments of one agent count as converged
+CONVERGENCE_RATIO = 0.95
+
+
+def all_commented(comment_pool):
+    commented = {c.agent.name for c in comment_pool.comments}
+    if all(agent.name in commented for agent in comment_pool.all_agents):
+        return 'every agent has commented'
+    return None
+
+
+def code_compiles(comment_pool):
+    comment = last_comment_of(comment_pool, CODE_AGENT_NAME)
+    if comment is None or '```' not in comment.comment_text:
+        return None
+    code = extract_code_from_string(comment.comment_text).replace('inrange', 'in range')
+    if 'def ' not in code:
+        return None
+    try:
+        compile(code, '<developer>', 'exec')
+    except (SyntaxError, ValueError):
+        return None
+    return 'Developer code compiles'
+
+
+def converged(comment_pool):
+    if not comment_pool.comments:
+        return None
+    latest = comment_pool.comments[-1]
+    for comment in reversed(comment_pool.comments[:-1]):
+        if comment.agent.name == latest.agent.name:
+            ratio = difflib.SequenceMatcher(None, comment.comment_text, latest.comment_text).quick_ratio()
+            if ratio >= CONVERGENCE_RATIO:
+                ratio = difflib.SequenceMatcher(None, comment.comment_text, latest.comment_text).ratio()
+            if ratio >= CONVERGENCE_RATIO:
+                return f'{latest.agent.name} comments converged ({ratio:.2f})'
+            return None
+    return None
+
+
+STOP_CRITERIA = {
+    'all_commented': all_commented,
+    'code_compiles': code_compiles,
+    'converged': converged,
+}
+
+
+def validate_stop_criteria(criteria):
+    """Raise ValueError if `criteria` names an unknown criterion."""
+    for name in criteria:
+        if name not in STOP_CRITERIA:
+            raise ValueError(f'Unknown stop criterion: {name}, expected one of {list(STOP_CRITERIA)}')
+
+
+def check_stop(comment_pool, criteria):
+    """Return the reason of the first criterion in `criteria` that holds, or None."""
+    validate_stop_criteria(criteria)
+    for name in criteria:
+        reason = STOP_CRITERIA[name](comment_pool)
+        if reason is not None:
+            return reason
+    return None
@@ -2,29 +2,44 @@ import os
 import json
 import importlib
 from result import Result
+import sandbox
+from sandbox import get_default_pool
 
 
 class NullWriter:
     def write(self, s):
         pass
 
-def test_generated_code(problem, samples, log_file=None):
+def test_generated_code(problem, code, samples, log_file=None, pool=None, timeout=None, memory_limit_mb=None):
+    """Run generated code against the samples in sandboxed worker processes.
+
+    Args:
+        problem: problem name, also the name of the generated function
+        code: source of the generated program
+        samples: list of {'input': ..., 'output': ...}
+        log_file: file-like object for the test log
+        pool: SandboxPool, defaults to the process-wide pool
+        timeout: wall-clock limit per sample in seconds
+        memory_limit_mb: memory limit per sample
+
+    Return:
+        Result of the test
+    """
     log_file = log_file or NullWriter()
+    pool = pool or get_default_pool()
 
-    try:
-        import generated_code
-        importlib.reload(generated_code)    #使用最新版本的generated_code
-    except BaseException as e:
-        log_file.write('There is grammar error in generated code!\n')
-        log_file.write(str(e) + '\n')
-        return Result.COMPILE_ERROR
+    records = pool.run_samples(
+        code,
+        problem,
+        [sample['input'] for sample in samples],    #每个sample的input作为函数参数
+        timeout=timeout,
+        memory_limit_mb=memory_limit_mb,
+    )
 
-    try:
-        func = getattr(generated_code, problem) #获得与问题名字对应的函数
-    except AttributeError as e:
-        log_file.write('Cannot load function!\n')
-        log_file.write(str(e) + '\n')
-        return Result.COMPILE_ERROR
+    for record in records:
+        if record.status == sandbox.COMPILE_ERROR:
+            log_file.write(record.error + '\n')
+            return Result.COMPILE_ERROR
 
     post_process = None
     if os.path.exists(os.path.join('dataset', problem, 'data_process.py')):
@@ -35,15 +50,21 @@ def test_generated_code(problem, samples, log_file=None):
     total_num = len(samples)
     passed_num = 0
     is_re = False
-    for i, sample in enumerate(samples):
-        try:
-            output = func(**sample['input'])    #调用函数输入sample中的input
-        except BaseException as e:
+    is_tle = False
+    for i, (sample, record) in enumerate(zip(samples, records)):
+        if record.status == sandbox.TIMEOUT:
+            is_tle = True
+            log_file.write('=' * 15 + f'test sample {i}' + '=' * 15 + '\n')
+            log_file.write('Time Limit Exceeded\n')
+            log_file.write(record.error + '\n\n')
+            continue
+        if record.status != sandbox.OK:
             is_re = True
             log_file.write('=' * 15 + f'test sample {i}' + '=' * 15 + '\n')
             log_file.write('Runtime Error\n')
-            log_file.write(str(e) + '\n\n')
+            log_file.write(record.error + '\n\n')
             continue
+        output = record.output
         if post_process is not None:
             output = post_process(*output)
         
@@ -61,6 +82,7 @@ def test_generated_code(problem, samples, log_file=None):
         log_file.write(str(output) + '\n\n')
         log_file.write('Ground Truth:\n')
         log_file.write(str(ground_truth) + '\n')
+        log_file.write(f'Time: {record.elapsed:.2f}s\n')
         is_passed=False
         if isinstance(output, (int, float)):
             if abs(output - ground_truth) < 0.1:
@@ -79,6 +101,8 @@ def test_generated_code(problem, samples, log_file=None):
     is_correct = (passed_num == total_num)
     log_file.write(f'is correct: {is_correct}\n')
 
+    if is_tle:
+        return Result.TIMEOUT
     if is_re:
         return Result.RUNTIME_ERROR
     if is_correct:
@@ -97,4 +121,6 @@ if __name__ == '__main__':
     dataset = 'LPWP'
     problem = 'prob_245'
     test_samples = read_test_samples(dataset, problem)
-    test_generated_code(problem, test_samples)
+    with open(os.path.join('dataset', dataset, problem, 'code_example.py'), 'r', encoding='utf8') as f:
+        code = f.read()
+    test_generated_code(problem, code, test_samples)
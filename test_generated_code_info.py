@@ -3,18 +3,18 @@ import json
 import importlib
 import traceback
 from result import Result
+from sandbox import load_generated_module
 
 
 class NullWriter:
     def write(self, s):
         pass
 
-def test_generated_code(problem, samples, log_file=None):
+def test_generated_code(problem, code, samples, log_file=None):
     log_file = log_file or NullWriter()
 
     try:
-        import generated_code
-        importlib.reload(generated_code)    #使用最新版本的generated_code
+        generated_code = load_generated_module(code, f'generated_{problem}')
     except BaseException as e:
         log_file.write('There is grammar error in generated code!\n')
         log_file.write(str(e) + '\n')
@@ -103,4 +103,6 @@ if __name__ == '__main__':
     dataset = 'MT_MR_TA'
     problem = 'prob_0'
     test_samples = read_test_samples(dataset, problem)
-    test_generated_code(problem, test_samples)
+    with open(os.path.join('dataset', dataset, problem, 'code_example.py'), 'r', encoding='utf8') as f:
+        code = f.read()
+    test_generated_code(problem, code, test_samples)
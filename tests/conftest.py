@@ -0,0 +1,103 @@
+import importlib
+import json
+import os
+import sys
+import types
+
+import pytest
+
+# the modules live at the repository root, not in an installed package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+MEMORY_MODULE = 'agentic_memory_rb.memory_system_rb'
+
+
+class FakeRetriever:
+    """In-memory stand-in for PersistentChromaRetriever; searches find nothing."""
+
+    def __init__(self, *args, **kwargs):
+        self.documents = {}
+        self.deleted = []
+
+    def add_document(self, document, metadata, doc_id):
+        self.documents[doc_id] = (document, metadata)
+
+    def delete_documents(self, ids):
+        self.deleted.extend(ids)
+        for doc_id in ids:
+            self.documents.pop(doc_id, None)
+
+    def search_batch(self, queries, ks, filters=None):
+        return [{'ids': [], 'documents': [], 'metadatas': [], 'distances': []} for _ in queries]
+
+    def search_bycatogory(self, query, catogory, k):
+        return {'ids': [[]], 'documents': [[]], 'metadatas': [[]], 'distances': [[]]}
+
+
+class FakeEvolver:
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def forward(self, *args, **kwargs):
+        raise AssertionError('the evolver is not used in these tests')
+
+
+@pytest.fixture
+def memory_system_rb(monkeypatch, request):
+    """The memory system module with Chroma and the LLM evolver replaced.
+
+    Where chromadb or langchain are not installed, the retriever and LLM
+    controller modules are replaced too, so these tests run everywhere.
+    """
+    try:
+        module = importlib.import_module(MEMORY_MODULE)
+    except ImportError:
+        retrievers = types.ModuleType('agentic_memory_rb.retrievers')
+        retrievers.PersistentChromaRetriever = FakeRetriever
+        llm_controller = types.ModuleType('agentic_memory_rb.llm_controller')
+        llm_controller.Evolver = FakeEvolver
+        monkeypatch.setitem(sys.modules, 'agentic_memory_rb.retrievers', retrievers)
+        monkeypatch.setitem(sys.modules, 'agentic_memory_rb.llm_controller', llm_controller)
+        module = importlib.import_module(MEMORY_MODULE)
+        # imported against the stand-ins, do not leak it into other tests
+        request.addfinalizer(lambda: sys.modules.pop(MEMORY_MODULE, None))
+    monkeypatch.setattr(module, 'PersistentChromaRetriever', FakeRetriever)
+    monkeypatch.setattr(module, 'Evolver', FakeEvolver)
+    return module
+
+
+@pytest.fixture
+def write_note(tmp_path):
+    """Write a memory note JSON file into tmp_path and return (path, data)."""
+
+    def write(note_id='note-1', memory_level='specific', **fields):
+        data = {'id': note_id, 'memory_level': memory_level, 'category': 'ST_SR_TA'}
+        if memory_level == 'specific':
+            data.update(problem_description='assign robots to tasks', problem_analysis='binary assignment',
+                        code='def prob_0():\n    return 1\n', timestamp='202601010000', score=0.0)
+        else:
+            data.update(resolve_summary='use binary assignment variables', version=0)
+        data.update(fields)
+        path = tmp_path / f'{note_id}.json'
+        path.write_text(json.dumps(data), encoding='utf-8')
+        return path, data
+
+    return write
+
+
+@pytest.fixture
+def make_memory_system(memory_system_rb, tmp_path):
+    """Build an AgenticMemorySystemRB over the notes written to tmp_path."""
+    systems = []
+
+    def make(**kwargs):
+        kwargs.setdefault('embedding_cache_dir', None)
+        kwargs.setdefault('evolve_workers', 1)
+        system = memory_system_rb.AgenticMemorySystemRB(str(tmp_path), **kwargs)
+        systems.append(system)
+        return system
+
+    yield make
+    for system in systems:
+        system.score_store.close()
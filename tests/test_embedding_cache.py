@@ -0,0 +1,61 @@
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+from agentic_memory_rb.embedding_cache import EmbeddingCache
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODEL = 'test-model'
+
+WRITER = '''
+import sys
+import numpy as np
+from agentic_memory_rb.embedding_cache import EmbeddingCache
+directory, prefix, count = sys.argv[1], sys.argv[2], int(sys.argv[3])
+cache = EmbeddingCache(directory, "test-model", initial_capacity=4)
+for i in range(count):
+    text = f"{prefix}-{i}"
+    cache.put_many([text], [[float(len(text)), float(i), float(sum(map(ord, text)))]])
+cache.close()
+'''
+
+
+def vector_of(text):
+    i = int(text.rsplit('-', 1)[1])
+    return np.array([len(text), i, sum(map(ord, text))], dtype=np.float32)
+
+
+def run_writer(directory, prefix, count):
+    return subprocess.Popen([sys.executable, '-c', WRITER, str(directory), prefix, str(count)],
+                            cwd=REPO_ROOT, env={**os.environ, 'PYTHONPATH': REPO_ROOT})
+
+
+def assert_all_cached(directory, texts):
+    cache = EmbeddingCache(str(directory), MODEL)
+    vectors = cache.get_many(texts)
+    for text, vector in zip(texts, vectors):
+        assert vector is not None, text
+        np.testing.assert_array_equal(vector, vector_of(text))
+    cache.close()
+
+
+def test_stale_writer_does_not_reuse_rows_of_another_process(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), MODEL, initial_capacity=4)
+    cache.put_many(['a-0'], [vector_of('a-0')])
+    # another process appends while this cache is open
+    assert run_writer(tmp_path, 'b', 10).wait(timeout=60) == 0
+    texts = [f'a-{i}' for i in range(1, 10)]
+    cache.put_many(texts, [vector_of(text) for text in texts])
+    np.testing.assert_array_equal(cache.get_many(['b-3'])[0], vector_of('b-3'))
+    cache.close()
+
+    assert_all_cached(tmp_path, [f'a-{i}' for i in range(10)] + [f'b-{i}' for i in range(10)])
+
+
+def test_concurrent_writers(tmp_path):
+    writers = [run_writer(tmp_path, prefix, 100) for prefix in ('p', 'q', 'r')]
+    assert [writer.wait(timeout=120) for writer in writers] == [0, 0, 0]
+
+    assert_all_cached(tmp_path, [f'{prefix}-{i}' for prefix in ('p', 'q', 'r') for i in range(100)])
@@ -0,0 +1,30 @@
+from agentic_memory_rb.eviction import BudgetPolicy, estimate_tokens
+
+
+def test_budget_policy_uses_manifest_sizes_without_loading_notes(write_note, make_memory_system):
+    _, data = write_note('low', score=-1.0, problem_analysis='x' * 400)
+    write_note('high', score=3.0, problem_analysis='y' * 400)
+    make_memory_system().score_store.close()
+
+    # second load: notes come from the manifest with their fields unread
+    system = make_memory_system()
+    notes = system.memories
+    assert all('_source_path' in note.__dict__ for note in notes.values())
+    size = estimate_tokens(data['problem_description'], data['problem_analysis'], data['code'])
+    assert notes['low'].tokens == notes['high'].tokens == size
+
+    victims = BudgetPolicy(max_tokens=size + 1).select_victims({'ST_SR_TA': list(notes.values())})
+    assert victims == ['low']
+    assert all('_source_path' in note.__dict__ for note in notes.values())
+
+
+def test_selecting_notes_does_not_count_a_retrieval(write_note, make_memory_system):
+    write_note('note-1')
+    system = make_memory_system()
+    selected = system.select_memory_bycatogory_content('assign robots', 'ST_SR_TA', k=2, tolerance_level=0)
+    assert [note.id for note in selected] == ['note-1']
+    assert selected[0].retrieval_count == 0
+
+    system.record_retrieval(selected)
+    assert selected[0].retrieval_count == 1
+    assert system.score_store.load()['note-1']['retrieval_count'] == 1
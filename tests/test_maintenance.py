@@ -0,0 +1,43 @@
+import pytest
+
+from agentic_memory_rb.maintenance import MemoryMaintenanceWorker
+
+
+def test_failed_job_is_retried_then_applied():
+    worker = MemoryMaintenanceWorker(max_retries=2)
+    calls = []
+
+    def flaky():
+        calls.append(1)
+        if len(calls) < 3:
+            raise RuntimeError('LLM call failed')
+        return 'applied'
+
+    try:
+        future = worker.submit('problem_1', flaky)
+        worker.flush()
+        assert future.result() == 'applied'
+        assert len(calls) == 3
+        assert worker.failed_jobs() == {}
+    finally:
+        worker.close()
+
+
+def test_job_failing_after_retries_is_reported():
+    worker = MemoryMaintenanceWorker(max_retries=1)
+    calls = []
+
+    def broken():
+        calls.append(1)
+        raise RuntimeError('LLM call failed')
+
+    try:
+        future = worker.submit('problem_1', broken)
+        worker.submit('problem_2', lambda: 'applied')
+        worker.flush()
+        assert len(calls) == 2
+        with pytest.raises(RuntimeError):
+            future.result()
+        assert list(worker.failed_jobs()) == ['problem_1']
+    finally:
+        worker.close()
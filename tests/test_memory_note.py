@@ -0,0 +1,52 @@
+import pytest
+
+
+def lazy_note(memory_system_rb, path, data):
+    entry = {key: data[key] for key in ('id', 'category', 'timestamp', 'score')}
+    return memory_system_rb.MemoryNote.from_manifest(entry, str(path))
+
+
+def test_deleted_unloaded_note_keeps_its_fields(memory_system_rb, write_note, tmp_path):
+    path, data = write_note()
+    # selected but not read yet, then forgotten by another worker
+    note = lazy_note(memory_system_rb, path, data)
+    assert note.delete_as_json(dir_complete=str(tmp_path))
+    assert not path.exists()
+
+    assert note.problem_description == data['problem_description']
+    assert note.problem_analysis == data['problem_analysis']
+    assert note.code == data['code']
+
+
+def test_missing_file_falls_back_to_defaults(memory_system_rb, write_note):
+    path, data = write_note()
+    note = lazy_note(memory_system_rb, path, data)
+    path.unlink()
+
+    assert note.code == 'null'
+    assert note.problem_description == 'null'
+    with pytest.raises(AttributeError):
+        note.not_a_field
+
+
+def test_delete_notes_from_memory_system(make_memory_system, write_note):
+    path, data = write_note('note-1')
+    write_note('note-2')
+    system = make_memory_system()
+    selected = system.memories['note-1']
+
+    assert system.delete_notes(['note-1', 'missing']) == 1
+    assert system.retriever.deleted == ['note-1']
+    assert not path.exists()
+    assert 'note-1' not in system.memories
+    assert selected.code == data['code']
+
+
+def test_delete_abstract_note(make_memory_system, write_note):
+    path, _ = write_note('summary-1', memory_level='abstruct')
+    system = make_memory_system()
+
+    assert system.delete_abstruct_note('summary-1')
+    assert not path.exists()
+    assert system.select_abstruct_memory_bycatogory('ST_SR_TA') == []
+    assert not system.delete_abstruct_note('summary-1')
@@ -0,0 +1,61 @@
+import sqlite3
+
+from agentic_memory_rb.score_store import MemoryScoreStore
+
+
+def stored_rows(path):
+    conn = sqlite3.connect(path)
+    try:
+        return dict(conn.execute('SELECT id, fields FROM note_fields'))
+    finally:
+        conn.close()
+
+
+def test_updates_are_written_at_the_threshold(tmp_path):
+    path = str(tmp_path / 'scores.sqlite3')
+    store = MemoryScoreStore(path, flush_every=3)
+    try:
+        store.update('a', score=1.0)
+        store.update('b', score=2.0)
+        store.update('a', retrieval_count=1)
+        assert stored_rows(path) == {}
+        assert store.load() == {'a': {'score': 1.0, 'retrieval_count': 1}, 'b': {'score': 2.0}}
+
+        store.update('c', score=3.0)
+        assert set(stored_rows(path)) == {'a', 'b', 'c'}
+        assert store.load()['a'] == {'score': 1.0, 'retrieval_count': 1}
+    finally:
+        store.close()
+
+
+def test_deletion_marks_remove_rows_at_flush(tmp_path):
+    path = str(tmp_path / 'scores.sqlite3')
+    store = MemoryScoreStore(path, flush_every=100)
+    try:
+        store.update('a', score=1.0)
+        store.update('b', score=2.0)
+        store.flush()
+
+        store.delete('a')
+        assert set(stored_rows(path)) == {'a', 'b'}
+        assert store.load() == {'b': {'score': 2.0}}
+
+        store.flush()
+        assert set(stored_rows(path)) == {'b'}
+    finally:
+        store.close()
+
+
+def test_stored_scores_are_loaded_into_the_retention_heap(write_note, make_memory_system):
+    for note_id in ('low', 'mid', 'high'):
+        write_note(note_id, score=0.0)
+    system = make_memory_system()
+    system._set_score('low', -2.0)
+    system._set_score('mid', 1.0)
+    system._set_score('high', 5.0)
+    system.flush()
+    system.score_store.close()
+
+    reloaded = make_memory_system()
+    assert reloaded.memories['high'].score == 5.0
+    assert reloaded._retention.pop_lowest('ST_SR_TA', 3) == ['low', 'mid', 'high']
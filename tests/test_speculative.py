@@ -0,0 +1,79 @@
+import asyncio
+import threading
+import time
+
+import sandbox
+from speculative import generate_first_passing
+
+FAST_CODE = 'def prob_0(a):\n    return a + 1\n'
+SLOW_CODE = 'def prob_0(a):\n    while True:\n        pass\n'
+
+
+class FakeReducer:
+    """Returns a fixed answer after `delay` seconds, like Reducer.aforward."""
+
+    def __init__(self, answer, delay):
+        self.answer = answer
+        self.delay = delay
+
+    async def aforward(self, problem_description, workspace):
+        await asyncio.sleep(self.delay)
+        return self.answer
+
+
+def test_returns_at_winner_latency_even_if_a_check_ignores_cancel():
+    def check(answer, cancel_event):
+        if answer == 'slow':
+            time.sleep(5)
+            return None, 'slow'
+        return answer, 'ok'
+
+    # the slow candidate arrives first, its check is still running when the winner passes
+    reducers = [FakeReducer('good', 0.3), FakeReducer('slow', 0.05)]
+    start = time.time()
+    answer, winner, checked = generate_first_passing(reducers, {}, None, check)
+    elapsed = time.time() - start
+
+    assert (answer, winner, checked) == ('good', 0, 1)
+    assert elapsed < 1.5
+
+
+def test_losing_sandbox_run_is_abandoned():
+    pool = sandbox.SandboxPool(num_workers=2, timeout=60)
+    cancelled = threading.Event()
+
+    def check(code, cancel_event):
+        records = pool.run_samples(code, 'prob_0', [{'a': 1}], cancel_event=cancel_event)
+        if records[0].status == sandbox.CANCELLED:
+            cancelled.set()
+        return (code, 'ran') if records[0].status == sandbox.OK else (None, records[0].status)
+
+    try:
+        # warm up the workers so the timing below measures the race only
+        pool.run_samples(FAST_CODE, 'prob_0', [{'a': 1}, {'a': 2}])
+        reducers = [FakeReducer(FAST_CODE, 0.5), FakeReducer(SLOW_CODE, 0.05)]
+        start = time.time()
+        answer, winner, _ = generate_first_passing(reducers, {}, None, check)
+        elapsed = time.time() - start
+
+        assert (answer, winner) == (FAST_CODE, 0)
+        assert elapsed < 2.0
+        # the worker stuck in the loser is killed and replaced
+        assert cancelled.wait(5)
+        records = pool.run_samples(FAST_CODE, 'prob_0', [{'a': 1}, {'a': 2}], timeout=10)
+        assert [record.output for record in records] == [2, 3]
+    finally:
+        pool.close()
+
+
+def test_cancel_event_skips_and_kills_samples():
+    pool = sandbox.SandboxPool(num_workers=1, timeout=60)
+    try:
+        cancel_event = threading.Event()
+        threading.Timer(0.3, cancel_event.set).start()
+        start = time.time()
+        records = pool.run_samples(SLOW_CODE, 'prob_0', [{'a': 1}, {'a': 2}], cancel_event=cancel_event)
+        assert time.time() - start < 5
+        assert [record.status for record in records] == [sandbox.CANCELLED, sandbox.CANCELLED]
+    finally:
+        pool.close()
@@ -0,0 +1,28 @@
+import pytest
+
+from stop_criteria import check_stop, validate_stop_criteria
+
+
+def test_unknown_stop_criterion_is_rejected():
+    validate_stop_criteria(['all_commented', 'converged'])
+    with pytest.raises(ValueError, match='Unknown stop criterion: bogus'):
+        validate_stop_criteria(['converged', 'bogus'])
+    with pytest.raises(ValueError):
+        check_stop(None, ['bogus'])
+
+
+@pytest.mark.parametrize('kwargs', [
+    {'stop_criteria': ['bogus']},
+    {'skip_reducer': True},
+    {'num_candidates': 2},
+])
+def test_chain_of_agents_checks_arguments_before_the_first_round(monkeypatch, kwargs):
+    pytest.importorskip('langchain')
+    import main
+
+    def no_agents(*args, **kwargs):
+        raise AssertionError('agents were built before the arguments were checked')
+
+    monkeypatch.setattr(main, 'Identifier', no_agents)
+    with pytest.raises(ValueError):
+        main.chain_of_agents({}, 3, model_name='gpt-4o', mode=2, **kwargs)